@@ -1,21 +1,27 @@
 from __future__ import annotations
 
-import json
+import bisect
+import calendar
 from dataclasses import dataclass
 from datetime import date, datetime
-from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+from macro_store import Changes, open_storage
 from rich.console import RenderableType
 from rich.panel import Panel
+from rich.segment import Segment
 from rich.table import Table
 from rich.text import Text
-from textual import on
+from textual import events, on
 from textual.app import App, ComposeResult
+from textual.binding import Binding
 from textual.containers import Container, Horizontal, Vertical
+from textual.geometry import Region, Size
 from textual.message import Message
 from textual.reactive import reactive
 from textual.screen import ModalScreen
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
 from textual.widgets import (
     Button,
     DataTable,
@@ -23,48 +29,12 @@ from textual.widgets import (
     Header,
     Input,
     Label,
-    ListItem,
-    ListView,
     Static,
     TabPane,
     TabbedContent,
 )
 
-DATA_FILE = Path.home() / ".macro_tracker.json"
-
-
-def _default_data() -> Dict[str, Any]:
-    return {
-        "profile": {
-            "name": "",
-            "age": 0,
-            "height": 0,
-            "weight": 0,
-            "goal": "maintain",
-            "daily_calories": 0,
-            "daily_protein": 0,
-            "daily_carbs": 0,
-            "daily_fat": 0,
-        },
-        "weight_history": [],
-        "daily_logs": {},
-    }
-
-
-def load_data() -> Dict[str, Any]:
-    if not DATA_FILE.exists():
-        return _default_data()
-    try:
-        with DATA_FILE.open("r") as handle:
-            return json.load(handle)
-    except Exception:
-        return _default_data()
-
-
-def save_data(data: Dict[str, Any]) -> None:
-    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with DATA_FILE.open("w") as handle:
-        json.dump(data, handle, indent=2)
+from habit_hub.watcher import DataWatcher
 
 
 @dataclass
@@ -120,24 +90,238 @@ class SummaryPanel(Static):
         return Panel(table, title=f"Daily Snapshot — {name}", subtitle=subtitle)
 
 
+class DateList(ScrollView, can_focus=True):
+    """Logged days, newest first, drawn one line per visible day.
+
+    Days are fetched through ``load_page`` ``PAGE_SIZE`` at a time, and the
+    next older page only once the view gets near the end of what is loaded.
+    Labels are formatted for the visible window plus ``BUFFER`` lines either
+    side. Nothing is mounted per day, so opening the dashboard costs the
+    same however much history there is.
+    """
+
+    PAGE_SIZE = 200
+    BUFFER = 20
+
+    DEFAULT_CSS = """
+    DateList {
+        height: 1fr;
+        overflow-x: hidden;
+    }
+
+    DateList > .date-list--cursor {
+        background: $accent 50%;
+    }
+
+    DateList:focus > .date-list--cursor {
+        background: $accent;
+        text-style: bold;
+    }
+    """
+
+    COMPONENT_CLASSES = {"date-list--cursor"}
+
+    BINDINGS = [
+        Binding("up", "cursor_up", "Up", show=False),
+        Binding("down", "cursor_down", "Down", show=False),
+        Binding("pageup", "page_up", "Page up", show=False),
+        Binding("pagedown", "page_down", "Page down", show=False),
+        Binding("home", "first", "First", show=False),
+        Binding("end", "last", "Last", show=False),
+        Binding("enter", "select", "Select", show=False),
+    ]
+
+    class Selected(Message):
+        def __init__(self, day: str) -> None:
+            self.day = day
+            super().__init__()
+
+    def __init__(self, load_page: Callable[[Optional[str], Optional[int]], List[str]], **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.load_page = load_page
+        self.days: List[str] = []  # loaded so far, newest first
+        self.complete = False  # the oldest day is loaded
+        self.cursor = 0
+        self._labels: Dict[str, str] = {}  # the window of days that may be drawn
+
+    @property
+    def highlighted_day(self) -> Optional[str]:
+        return self.days[self.cursor] if self.days else None
+
+    def reset(self) -> None:
+        """Start again from the newest page."""
+        self.days = []
+        self.complete = False
+        self.cursor = 0
+        self._labels = {}
+        self._load_more()
+        self.scroll_to(y=0, animate=False)
+        self._fill_window()
+
+    def add_day(self, day: str) -> None:
+        """Show a newly logged day, unless it is older than what is loaded yet."""
+        index = bisect.bisect_left(self.days, True, key=lambda loaded: loaded <= day)
+        if index < len(self.days) and self.days[index] == day:
+            return
+        if index == len(self.days) and not self.complete:
+            return  # arrives with its page
+        self.days.insert(index, day)
+        if len(self.days) > 1 and index <= self.cursor:
+            self.cursor += 1  # keep the same day highlighted
+        if index < self.scroll_offset.y:
+            self.scroll_to(y=self.scroll_offset.y + 1, animate=False)
+        self._update_size()
+        self._fill_window()
+
+    def jump(self, months: int) -> None:
+        """Move the cursor ``months`` back (negative) or forward from the highlighted day.
+
+        It lands on the nearest logged day at or beyond the target date, on
+        the side it was moving towards, paging in older days as needed.
+        """
+        day = self.highlighted_day
+        if day is None or not _is_iso_date(day):
+            return
+        target = _shift_months(date.fromisoformat(day), months).isoformat()
+        while not self.complete and self.days[-1] > target:
+            self._load_more()
+        if months < 0:
+            index = bisect.bisect_left(self.days, True, key=lambda loaded: loaded <= target)
+        else:
+            index = bisect.bisect_left(self.days, True, key=lambda loaded: loaded < target) - 1
+        self.move_cursor(index)
+
+    def move_cursor(self, index: int) -> None:
+        while not self.complete and index >= len(self.days):
+            self._load_more()
+        if not self.days:
+            return
+        index = max(0, min(index, len(self.days) - 1))
+        previous, self.cursor = self.cursor, index
+        self.refresh_line(previous)
+        self.refresh_line(index)
+        self.scroll_to_region(Region(0, index, 1, 1), animate=False)
+
+    def action_cursor_up(self) -> None:
+        self.move_cursor(self.cursor - 1)
+
+    def action_cursor_down(self) -> None:
+        self.move_cursor(self.cursor + 1)
+
+    def action_page_up(self) -> None:
+        self.move_cursor(self.cursor - max(self.size.height - 1, 1))
+
+    def action_page_down(self) -> None:
+        self.move_cursor(self.cursor + max(self.size.height - 1, 1))
+
+    def action_first(self) -> None:
+        self.move_cursor(0)
+
+    def action_last(self) -> None:
+        if not self.complete:
+            self.days.extend(self.load_page(self.days[-1] if self.days else None, None))
+            self.complete = True
+            self._update_size()
+        self.move_cursor(len(self.days) - 1)
+
+    def action_select(self) -> None:
+        if self.days:
+            self.post_message(self.Selected(self.days[self.cursor]))
+
+    def on_click(self, event: events.Click) -> None:
+        offset = event.get_content_offset(self)
+        if offset is None:
+            return
+        index = self.scroll_offset.y + offset.y
+        if index < len(self.days):
+            self.move_cursor(index)
+            self.action_select()
+
+    def on_resize(self, event: events.Resize) -> None:
+        self._fill_window()
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        self._fill_window()
+
+    def render_line(self, y: int) -> Strip:
+        width = self.scrollable_content_region.width
+        index = self.scroll_offset.y + y
+        if not self.days:
+            text, style = ("No entries yet" if y == 0 else ""), self.rich_style
+        elif index < len(self.days):
+            day = self.days[index]
+            text = self._labels.get(day) or _day_label(day)
+            style = self.get_component_rich_style("date-list--cursor") if index == self.cursor else self.rich_style
+        else:
+            text, style = "", self.rich_style
+        return Strip([Segment(text, style)]).adjust_cell_length(width, style)
+
+    def _load_more(self) -> None:
+        page = self.load_page(self.days[-1] if self.days else None, self.PAGE_SIZE)
+        self.days.extend(page)
+        self.complete = len(page) < self.PAGE_SIZE
+        self._update_size()
+
+    def _update_size(self) -> None:
+        self.virtual_size = Size(0, len(self.days))
+        self.refresh()
+
+    def _fill_window(self) -> None:
+        top = self.scroll_offset.y
+        bottom = top + self.size.height
+        while not self.complete and bottom + self.BUFFER >= len(self.days):
+            self._load_more()
+        window = self.days[max(0, top - self.BUFFER):bottom + self.BUFFER]
+        self._labels = {day: self._labels.get(day) or _day_label(day) for day in window}
+
+
 class FoodTable(DataTable):
+    COLUMNS = (
+        ("time", "Time"),
+        ("name", "Food"),
+        ("calories", "Calories"),
+        ("protein", "Protein"),
+        ("carbs", "Carbs"),
+        ("fat", "Fat"),
+        ("quantity", "Qty"),
+    )
+
     def on_mount(self) -> None:  # type: ignore[override]
-        self.add_columns("Time", "Food", "Calories", "Protein", "Carbs", "Fat", "Qty")
+        for key, label in self.COLUMNS:
+            self.add_column(label, key=key)
         self.cursor_type = "row"
         self.zebra_stripes = True
 
-    def update_entries(self, foods: Iterable[Dict[str, Any]]) -> None:
-        self.clear()
-        for food in foods:
-            self.add_row(
-                food.get("time", "—"),
-                food.get("name", "Unknown"),
-                f"{food.get('calories', 0):.0f}",
-                f"{food.get('protein', 0):.0f}",
-                f"{food.get('carbs', 0):.0f}",
-                f"{food.get('fat', 0):.0f}",
-                food.get("quantity", "1"),
-            )
+    def update_entries(self, day: Optional[str], foods: Iterable[Dict[str, Any]]) -> None:
+        """Show ``day``'s foods, touching only the rows that were added, removed or changed.
+
+        Rows are keyed by day and position: foods are only ever appended to a
+        day's log, so that names an entry for as long as it exists. The
+        cursor stays on its entry and the scroll position is kept. A different
+        day shares no rows with the current one and is drawn from scratch.
+        """
+        rows = {f"{day}/{index}": _food_cells(food) for index, food in enumerate(foods)}
+        shown = [row.key.value for row in self.ordered_rows]
+        kept = [key for key in shown if key in rows]
+        if not kept or list(rows)[:len(kept)] != kept:
+            self.clear()
+            for key, cells in rows.items():
+                self.add_row(*cells, key=key)
+            return
+
+        cursor_key = shown[self.cursor_row] if self.cursor_row < len(shown) else None
+        for key in shown:
+            if key not in rows:
+                self.remove_row(key)
+        for key in kept:
+            for (column, _), old, new in zip(self.COLUMNS, self.get_row(key), rows[key]):
+                if old != new:
+                    self.update_cell(key, column, new)
+        for key in list(rows)[len(kept):]:
+            self.add_row(*rows[key], key=key)
+        if cursor_key in rows and self.get_row_index(cursor_key) != self.cursor_row:
+            self.move_cursor(row=self.get_row_index(cursor_key), scroll=False)
 
 
 class WeightTrend(Static):
@@ -228,6 +412,10 @@ class HabitHubApp(App):
         padding-bottom: 1;
     }
 
+    #date-list {
+        background: $boost;
+    }
+
     #main {
         padding: 0 1;
     }
@@ -258,13 +446,25 @@ class HabitHubApp(App):
         ("q", "quit", "Quit"),
         ("r", "reload", "Reload data"),
         ("n", "new_entry", "Quick log"),
+        ("left_square_bracket", "jump_months(-1)", "Month back"),
+        ("right_square_bracket", "jump_months(1)", "Month forward"),
+        ("left_curly_bracket", "jump_months(-12)", "Year back"),
+        ("right_curly_bracket", "jump_months(12)", "Year forward"),
     ]
 
     selected_date: reactive[str | None] = reactive(None)
 
+    class DataChanged(Message):
+        """Posted from the watcher thread when the data files change."""
+
     def __init__(self) -> None:
         super().__init__()
-        self.data: Dict[str, Any] = load_data()
+        # Reads and writes go through the shared storage, so the Macro Tracker
+        # CLI can log at the same time without either losing entries.
+        self.store = open_storage()
+        self.data: Dict[str, Any] = {}
+        # post_message is thread-safe; the changes are applied on the UI thread.
+        self.watcher = DataWatcher(self.store.data_files(), lambda: self.post_message(self.DataChanged()))
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
@@ -272,7 +472,7 @@ class HabitHubApp(App):
             with Horizontal():
                 with Vertical(id="sidebar"):
                     yield Label("Days", id="sidebar-title")
-                    yield ListView(id="date-list")
+                    yield DateList(self.store.logged_days, id="date-list")
                     yield Button("New Quick Log", id="new-entry-button", variant="primary")
                 with Vertical(id="main"):
                     with TabbedContent():
@@ -286,31 +486,66 @@ class HabitHubApp(App):
 
     def on_mount(self) -> None:
         self.refresh_data()
+        self.watcher.start()
+
+    def on_unmount(self) -> None:
+        self.watcher.stop()
+        self.store.close()
 
     def refresh_data(self) -> None:
-        self.data = load_data()
-        dates = sorted((self.data.get("daily_logs") or {}).keys(), reverse=True)
-        list_view = self.query_one("#date-list", ListView)
-        list_view.clear()
-        if not dates:
-            list_view.append(ListItem(Label("No entries yet")))
-            self.selected_date = None
-        else:
-            for index, day in enumerate(dates):
-                label = datetime.fromisoformat(day).strftime("%a %d %b %Y") if _is_iso_date(day) else day
-                list_item = ListItem(Label(label))
-                setattr(list_item, "day_key", day)
-                list_view.append(list_item)
-            self.selected_date = dates[0]
-            list_view.index = 0
+        self.store.refresh()
+        self.data = {
+            "profile": self.store.profile(),
+            "weight_history": self.store.weight_history(),
+            "daily_logs": {},  # filled in by day_log as days are shown
+        }
+        date_list = self.query_one("#date-list", DateList)
+        date_list.reset()
+        self.selected_date = date_list.highlighted_day
         self.update_views()
 
-    def update_views(self) -> None:
+    def day_log(self, day: str) -> Dict[str, Any]:
+        logs = self.data["daily_logs"]
+        if day not in logs:
+            logs[day] = self.store.daily_log(day) or {}
+        return logs[day]
+
+    def apply_changes(self, changes: Changes) -> None:
+        """Patch the data, sidebar and views for ``changes`` only.
+
+        Changed days are dropped from the cache, to be read again when shown,
+        and new days are inserted into the sidebar, so the cost follows the
+        size of the change rather than the length of the history.
+        """
+        if changes.everything:
+            self.refresh_data()
+            return
+        date_list = self.query_one("#date-list", DateList)
+        for day in changes.days:
+            self.data["daily_logs"].pop(day, None)
+            date_list.add_day(day)
+        if self.selected_date is None:
+            self.selected_date = date_list.highlighted_day
+        if changes.profile:
+            self.data["profile"] = self.store.profile()
+        if changes.weights:
+            self.data["weight_history"] = self.store.weight_history()
+        self.update_views(
+            day=changes.profile or self.selected_date in changes.days,
+            weights=changes.weights,
+        )
+
+    def update_views(self, day: bool = True, weights: bool = True) -> None:
+        if weights:
+            weight_panel = self.query_one("#weight-trend", WeightTrend)
+            weight_panel.weights = self.data.get("weight_history", [])
+        if not day:
+            return
         profile = self.data.get("profile", {})
         day_data = {}
         foods: List[Dict[str, Any]] = []
         if self.selected_date:
-            day_data = self.data.get("daily_logs", {}).get(self.selected_date, {})
+            day_data = self.day_log(self.selected_date)
             foods = day_data.get("foods", [])
 
         summary = self.query_one("#summary-panel", SummaryPanel)
@@ -318,19 +553,23 @@ class HabitHubApp(App):
         summary.totals = MacroTotals.from_day(day_data)
 
         food_table = self.query_one("#food-table", FoodTable)
-        food_table.update_entries(foods)
+        food_table.update_entries(self.selected_date, foods)
 
-        weight_panel = self.query_one("#weight-trend", WeightTrend)
-        weight_panel.weights = self.data.get("weight_history", [])
+    @on(DataChanged)
+    def handle_data_changed(self) -> None:
+        changes = self.store.refresh()
+        if changes:
+            self.apply_changes(changes)
 
-    @on(ListView.Selected)
-    def handle_date_selected(self, event: ListView.Selected) -> None:
-        if event.list_view.id != "date-list":
-            return
-        selected_day = getattr(event.item, "day_key", None)
-        if selected_day:
-            self.selected_date = selected_day
-            self.update_views()
+    @on(DateList.Selected)
+    def handle_date_selected(self, event: DateList.Selected) -> None:
+        self.selected_date = event.day
+        self.update_views()
+
+    def action_jump_months(self, months: int) -> None:
+        date_list = self.query_one("#date-list", DateList)
+        date_list.jump(months)
+        date_list.action_select()
 
     def action_reload(self) -> None:
         self.refresh_data()
@@ -346,27 +585,32 @@ class HabitHubApp(App):
         if not food:
             return
         today = date.today().isoformat()
-        logs = self.data.setdefault("daily_logs", {})
-        day = logs.setdefault(
-            today,
-            {
-                "foods": [],
-                "total_calories": 0,
-                "total_protein": 0,
-                "total_carbs": 0,
-                "total_fat": 0,
-            },
-        )
-        day["foods"].append(food)
-        day["total_calories"] += food["calories"]
-        day["total_protein"] += food["protein"]
-        day["total_carbs"] += food["carbs"]
-        day["total_fat"] += food["fat"]
-        save_data(self.data)
-        self.refresh_data()
-        today_label = date.today().isoformat()
-        self.selected_date = today_label
-        self.update_views()
+        # Appends one entry; anything logged elsewhere meanwhile is kept.
+        self.store.log_food(today, food)
+        self.selected_date = today
+        self.apply_changes(self.store.refresh())
+
+
+def _food_cells(food: Dict[str, Any]) -> Tuple[str, ...]:
+    return (
+        food.get("time", "—"),
+        food.get("name", "Unknown"),
+        f"{food.get('calories', 0):.0f}",
+        f"{food.get('protein', 0):.0f}",
+        f"{food.get('carbs', 0):.0f}",
+        f"{food.get('fat', 0):.0f}",
+        food.get("quantity", "1"),
+    )
+
+
+def _day_label(day: str) -> str:
+    return datetime.fromisoformat(day).strftime("%a %d %b %Y") if _is_iso_date(day) else day
+
+
+def _shift_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
 
 
 def _is_iso_date(value: str) -> bool:
@@ -0,0 +1,151 @@
+"""Watch the Macro Tracker data files for changes made by other processes.
+
+On Linux the watcher uses inotify (through ``ctypes``, so there is no extra
+dependency) on the directories holding the files, since snapshots are
+replaced by renaming a new file over the old one. Elsewhere, or if inotify
+cannot be set up, it polls the files' modification time, size and inode.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; then len bytes of name
+
+Stamp = Optional[Tuple[int, int, int]]
+
+
+def _libc() -> Optional[ctypes.CDLL]:
+    """The C library if it offers inotify, else None."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def _event_names(buffer: bytes) -> Iterable[bytes]:
+    offset = 0
+    while offset + _EVENT.size <= len(buffer):
+        _, _, _, length = _EVENT.unpack_from(buffer, offset)
+        offset += _EVENT.size
+        yield buffer[offset:offset + length].rstrip(b"\0")
+        offset += length
+
+
+class DataWatcher:
+    """Calls ``callback`` on a background thread when any of ``paths`` changes.
+
+    One write shows up as a burst of events (the append, a compaction's
+    rename), so everything within ``debounce`` seconds of the first event
+    results in a single call. ``mode`` says whether inotify or polling is used.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        callback: Callable[[], None],
+        poll_interval: float = 1.0,
+        debounce: float = 0.05,
+    ) -> None:
+        self.paths: List[Path] = [Path(path) for path in paths]
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.mode: Optional[str] = None
+        self._stopping = threading.Event()
+        self._wake_read, self._wake_write = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        fd = self._open_inotify()
+        self.mode = "polling" if fd is None else "inotify"
+        target = self._poll if fd is None else self._watch
+        self._thread = threading.Thread(target=target, args=(fd,), name="habit-hub-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._stopping.is_set():
+            return  # older Textual releases send the app's Unmount twice
+        self._stopping.set()
+        os.write(self._wake_write, b"x")
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+
+    def _open_inotify(self) -> Optional[int]:
+        libc = _libc()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            return None
+        for directory in {path.parent for path in self.paths}:
+            if libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+                os.close(fd)
+                return None
+        return fd
+
+    def _watch(self, fd: int) -> None:
+        names: Set[bytes] = {os.fsencode(path.name) for path in self.paths}
+        try:
+            while True:
+                ready, _, _ = select.select([fd, self._wake_read], [], [])
+                if self._wake_read in ready:
+                    return
+                if names.isdisjoint(_event_names(os.read(fd, 65536))):
+                    continue  # another file in the same directory
+                # Let the rest of the burst arrive, then report it once.
+                deadline = time.monotonic() + self.debounce
+                while (left := deadline - time.monotonic()) > 0:
+                    ready, _, _ = select.select([fd, self._wake_read], [], [], left)
+                    if self._wake_read in ready:
+                        return
+                    if fd in ready:
+                        os.read(fd, 65536)
+                self.callback()
+        finally:
+            os.close(fd)
+
+    def _stamps(self) -> List[Stamp]:
+        stamps: List[Stamp] = []
+        for path in self.paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                stamps.append(None)
+                continue
+            stamps.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        return stamps
+
+    def _poll(self, _: None) -> None:
+        last = self._stamps()
+        while not self._stopping.wait(self.poll_interval):
+            stamps = self._stamps()
+            if stamps != last:
+                last = stamps
+                self.callback()
@@ -0,0 +1,33 @@
+"""
+Shared storage for the Macro Tracker data
+
+Used by macro-tracker and Habit Hub, so both read and write
+``~/.macro_tracker.*`` the same way and can run at the same time.
+"""
+
+from macro_store.files import locked, write_atomic
+from macro_store.storage import (
+    BACKENDS,
+    JSON_FILE,
+    SQLITE_FILE,
+    Changes,
+    JournalStorage,
+    apply_event,
+    empty_data,
+    export_data,
+    open_storage,
+)
+
+__all__ = [
+    "BACKENDS",
+    "JSON_FILE",
+    "SQLITE_FILE",
+    "Changes",
+    "JournalStorage",
+    "apply_event",
+    "empty_data",
+    "export_data",
+    "locked",
+    "open_storage",
+    "write_atomic",
+]
@@ -0,0 +1,60 @@
+"""
+File primitives shared by the storage backends and the caches
+
+- ``write_atomic`` replaces a file by writing a temporary file next to it and
+  renaming it over the original, so readers see the old or the new contents
+  and never a half-written file.
+- ``locked`` holds an advisory ``flock`` on a lock file. Every process that
+  writes the macro data takes it, only around the few system calls that must
+  not interleave, so writers never wait on each other for long.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writers are not coordinated
+    fcntl = None
+
+
+def write_temp(path, text):
+    """Durably write ``text`` to a new temporary file next to ``path`` and return it
+
+    The name includes the process and thread, so concurrent writers never
+    share a temporary file.
+    """
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp
+
+
+def write_atomic(path, text):
+    """Replace ``path`` so readers see either the old or the new file"""
+    os.replace(write_temp(path, text), path)
+
+
+@contextmanager
+def locked(path, blocking=True):
+    """Hold an exclusive advisory lock on ``path`` (created if needed)
+
+    Yields True once the lock is held. With ``blocking=False`` it yields
+    False at once if someone else holds it. Locks are per open file, so two
+    threads of one process exclude each other as well. The lock is released
+    when the block exits, or by the OS if the process dies while holding it.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+    finally:
+        os.close(fd)
@@ -0,0 +1,327 @@
+"""
+SQLite backend for the macro tracker
+
+Profile, weights and foods live in their own tables in ``~/.macro_tracker.db``.
+``daily_totals`` keeps one row per day and is updated in the same transaction
+as every food insert. Today's summary is a primary-key lookup plus an
+indexed read of that day's foods, and nothing else is loaded.
+
+Concurrent writers are left to SQLite's own locking. Write transactions
+start with BEGIN IMMEDIATE, so a second writer waits for the first (up to
+``BUSY_TIMEOUT`` seconds) instead of failing half way through.
+"""
+
+import sqlite3
+from pathlib import Path
+
+from macro_store.storage import Changes
+
+PROFILE_FIELDS = (
+    "name", "age", "height", "weight", "goal",
+    "daily_calories", "daily_protein", "daily_carbs", "daily_fat",
+)
+FOOD_FIELDS = ("name", "calories", "protein", "carbs", "fat", "quantity", "time")
+BUSY_TIMEOUT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    height REAL NOT NULL,
+    weight REAL NOT NULL,
+    goal TEXT NOT NULL,
+    daily_calories INTEGER NOT NULL,
+    daily_protein INTEGER NOT NULL,
+    daily_carbs INTEGER NOT NULL,
+    daily_fat INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS weights (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    weight REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_weights_date ON weights (date, id);
+CREATE TABLE IF NOT EXISTS foods (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    name TEXT NOT NULL,
+    calories REAL NOT NULL,
+    protein REAL NOT NULL,
+    carbs REAL NOT NULL,
+    fat REAL NOT NULL,
+    quantity TEXT NOT NULL,
+    time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_foods_date ON foods (date, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    date TEXT PRIMARY KEY,
+    foods INTEGER NOT NULL,
+    calories REAL NOT NULL,
+    protein REAL NOT NULL,
+    carbs REAL NOT NULL,
+    fat REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+DEFAULT_PROFILE = {
+    "name": "",
+    "age": 0,
+    "height": 0,
+    "weight": 0,
+    "goal": "maintain",
+    "daily_calories": 2000,
+    "daily_protein": 150,
+    "daily_carbs": 200,
+    "daily_fat": 65
+}
+
+_ADD_TO_TOTALS = """
+INSERT INTO daily_totals (date, foods, calories, protein, carbs, fat) VALUES (?, 1, ?, ?, ?, ?)
+ON CONFLICT (date) DO UPDATE SET
+    foods = foods + 1,
+    calories = calories + excluded.calories,
+    protein = protein + excluded.protein,
+    carbs = carbs + excluded.carbs,
+    fat = fat + excluded.fat
+"""
+
+
+class SqliteStorage:
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level="IMMEDIATE")
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._seen = self._marks()
+
+    def profile(self):
+        row = self.db.execute("SELECT * FROM profile WHERE id = 1").fetchone()
+        if row is None:
+            return dict(DEFAULT_PROFILE)
+        return {field: row[field] for field in PROFILE_FIELDS}
+
+    def set_profile(self, profile):
+        with self.db:
+            self._write_profile(profile)
+            self._bump_version()
+
+    def log_weight(self, day, weight):
+        with self.db:
+            self.db.execute("INSERT INTO weights (date, weight) VALUES (?, ?)", (day, weight))
+            # Keep the profile's current weight in step, as the journal does:
+            # a back-dated weigh-in is history, not the current weight. The
+            # insert above started the write transaction, so this is consistent.
+            latest = self.db.execute("SELECT MAX(date) FROM weights").fetchone()[0]
+            if day >= latest:
+                self._write_profile({**self.profile(), "weight": weight})
+            self._bump_version()
+
+    def weight_history(self, limit=None):
+        """The last ``limit`` weigh-ins (all of them for None), oldest first"""
+        rows = self.db.execute(
+            "SELECT date, weight FROM weights ORDER BY date DESC, id DESC LIMIT ?", (limit or -1,)
+        ).fetchall()
+        return [{"date": row["date"], "weight": row["weight"]} for row in reversed(rows)]
+
+    def log_food(self, day, food):
+        with self.db:
+            self.db.execute(
+                "INSERT INTO foods (date, name, calories, protein, carbs, fat, quantity, time) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (day, *(food[field] for field in FOOD_FIELDS)),
+            )
+            self.db.execute(_ADD_TO_TOTALS, (day, food["calories"], food["protein"], food["carbs"], food["fat"]))
+            self._bump_version()
+
+    def daily_log(self, day):
+        """Return a day in the JSON layout, or None if nothing was logged"""
+        totals = self.db.execute("SELECT * FROM daily_totals WHERE date = ?", (day,)).fetchone()
+        if totals is None:
+            return None
+        foods = self.db.execute(
+            "SELECT name, calories, protein, carbs, fat, quantity, time FROM foods WHERE date = ? ORDER BY id",
+            (day,),
+        ).fetchall()
+        return {
+            "foods": [dict(food) for food in foods],
+            "total_calories": totals["calories"],
+            "total_protein": totals["protein"],
+            "total_carbs": totals["carbs"],
+            "total_fat": totals["fat"]
+        }
+
+    def logged_days(self, before=None, limit=None):
+        """Up to ``limit`` days with food logged before ``before`` (all days for None), newest first"""
+        # Two queries rather than "? IS NULL OR date < ?", so SQLite uses the
+        # primary key to start at ``before``.
+        if before is None:
+            rows = self.db.execute("SELECT date FROM daily_totals ORDER BY date DESC LIMIT ?", (limit or -1,))
+        else:
+            rows = self.db.execute(
+                "SELECT date FROM daily_totals WHERE date < ? ORDER BY date DESC LIMIT ?", (before, limit or -1)
+            )
+        return [row[0] for row in rows]
+
+    def iter_foods(self):
+        """Yield (day, food) for every food ever logged, oldest first"""
+        cursor = self.db.execute(
+            "SELECT date, name, calories, protein, carbs, fat, quantity, time FROM foods ORDER BY date, id"
+        )
+        for row in cursor:
+            yield row["date"], {field: row[field] for field in FOOD_FIELDS}
+
+    def iter_daily_totals(self):
+        """Yield (day, calories, protein, carbs, fat) for every logged day, oldest first"""
+        yield from self.db.execute(
+            "SELECT date, calories, protein, carbs, fat FROM daily_totals ORDER BY date"
+        )
+
+    def import_foods(self, rows, import_id=None):
+        """Add many (day, food) rows in one transaction and return the days touched
+
+        Totals of the touched days are recomputed from their foods in bulk.
+        An ``import_id`` is recorded in ``meta`` in the same transaction.
+        Returns None, and adds nothing, if that id was already merged.
+        """
+        with self.db:
+            # Take the write lock before reading MAX(id), so no other
+            # writer's rows can land in between.
+            self.db.execute("BEGIN IMMEDIATE")
+            if import_id is not None:
+                key = f"import:{import_id}"
+                if self.db.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                    return None
+                self.db.execute("INSERT INTO meta (key, value) VALUES (?, 1)", (key,))
+            before = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM foods").fetchone()[0]
+            self.db.executemany(
+                "INSERT INTO foods (date, name, calories, protein, carbs, fat, quantity, time) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((day, *(food[field] for field in FOOD_FIELDS)) for day, food in rows),
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO daily_totals (date, foods, calories, protein, carbs, fat) "
+                "SELECT date, COUNT(*), SUM(calories), SUM(protein), SUM(carbs), SUM(fat) FROM foods "
+                "WHERE date IN (SELECT DISTINCT date FROM foods WHERE id > ?) GROUP BY date",
+                (before,),
+            )
+            self._bump_version()
+            return self.db.execute(
+                "SELECT COUNT(DISTINCT date) FROM foods WHERE id > ?", (before,)
+            ).fetchone()[0]
+
+    def json_imported(self):
+        """Whether the JSON history has been brought across by ``import_json``"""
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+        if row is None:
+            # A database from before the flag was recorded: one that was ever
+            # written to went through the import (or had nothing to import).
+            return self.version() > 0
+        return bool(row[0])
+
+    def version(self):
+        """A number that changes whenever the data does"""
+        return self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def refresh(self):
+        """The ``Changes`` since the last call, this process's own writes included
+
+        Rows are only ever appended, so new ids say which days and weights
+        changed. Ids that went down mean the data was replaced (``import_json``).
+        """
+        changes = Changes()
+        marks = self._marks()
+        version, food_id, weight_id, profile = marks
+        seen_version, seen_food_id, seen_weight_id, seen_profile = self._seen
+        self._seen = marks
+        if version == seen_version:
+            return changes
+        if food_id < seen_food_id or weight_id < seen_weight_id:
+            changes.everything = True
+            return changes
+        # Only up to the marks just read: later rows belong to the next refresh.
+        changes.days.update(row[0] for row in self.db.execute(
+            "SELECT DISTINCT date FROM foods WHERE id > ? AND id <= ?", (seen_food_id, food_id)
+        ))
+        changes.weights = weight_id > seen_weight_id
+        changes.profile = profile != seen_profile
+        return changes
+
+    def data_files(self):
+        """The files that change whenever the data does, for watching"""
+        path = Path(self.path)
+        return [path, path.with_name(f"{path.name}-wal")]
+
+    def close(self):
+        self.db.close()
+
+    def _marks(self):
+        # (version, last food id, last weight id, profile): what ``refresh``
+        # compares. One statement reads one snapshot of the database, so a
+        # write from another process cannot land between the parts.
+        row = self.db.execute(
+            "SELECT (SELECT value FROM meta WHERE key = 'version') AS version, "
+            "(SELECT COALESCE(MAX(id), 0) FROM foods) AS food_id, "
+            "(SELECT COALESCE(MAX(id), 0) FROM weights) AS weight_id, profile.* "
+            "FROM (SELECT 1) LEFT JOIN profile ON profile.id = 1"
+        ).fetchone()
+        profile = dict(DEFAULT_PROFILE) if row["id"] is None else {field: row[field] for field in PROFILE_FIELDS}
+        return row["version"], row["food_id"], row["weight_id"], profile
+
+    def _bump_version(self):
+        self.db.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def _write_profile(self, profile):
+        self.db.execute(
+            f"INSERT OR REPLACE INTO profile (id, {', '.join(PROFILE_FIELDS)}) "
+            f"VALUES (1, {', '.join('?' * len(PROFILE_FIELDS))})",
+            tuple(profile[field] for field in PROFILE_FIELDS),
+        )
+
+
+def import_json(store, data):
+    """Copy data in the JSON layout into an SQLite store in one transaction
+
+    The ``json_imported`` mark is set in the same transaction, so an import
+    that fails or is cut short leaves nothing behind and is tried again on
+    the next start. Returns False if another process got there first.
+    """
+    db = store.db
+    with db:
+        db.execute("BEGIN IMMEDIATE")
+        if store.json_imported():
+            return False
+        db.execute("DELETE FROM profile")
+        db.execute("DELETE FROM weights")
+        db.execute("DELETE FROM foods")
+        db.execute("DELETE FROM daily_totals")
+        store._write_profile({**DEFAULT_PROFILE, **data.get("profile", {})})
+        db.executemany(
+            "INSERT INTO weights (date, weight) VALUES (?, ?)",
+            ((entry["date"], entry["weight"]) for entry in data.get("weight_history", [])),
+        )
+        db.executemany(
+            "INSERT INTO foods (date, name, calories, protein, carbs, fat, quantity, time) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (day, *(food.get(field, "") for field in FOOD_FIELDS))
+                for day, log in sorted(data.get("daily_logs", {}).items())
+                for food in log["foods"]
+            ),
+        )
+        # Totals are recomputed from the foods rather than copied across.
+        db.execute(
+            "INSERT INTO daily_totals (date, foods, calories, protein, carbs, fat) "
+            "SELECT date, COUNT(*), SUM(calories), SUM(protein), SUM(carbs), SUM(fat) "
+            "FROM foods GROUP BY date"
+        )
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', 1)")
+        store._bump_version()
+    return True
@@ -0,0 +1,603 @@
+"""
+Storage backends for the macro tracker
+
+Two backends offer the same methods (``profile``, ``set_profile``,
+``log_weight``, ``weight_history``, ``log_food``, ``daily_log``,
+``logged_days``, ``iter_foods``, ``iter_daily_totals``, ``import_foods``, ``version``,
+``refresh``, ``data_files``, ``close``):
+the JSON journal below and SQLite (``sqlite_storage.py``). ``open_storage``
+picks one from ``--storage`` or ``MACRO_TRACKER_STORAGE``.
+
+Journal backend
+
+Every change is one JSON line appended to a journal, so logging a food costs
+one small write no matter how much history exists. The full data is kept in
+a snapshot file that is rewritten in the background every so often
+(compaction). Startup reads the snapshot and replays the journal on top.
+
+Files, next to each other:
+- ``.macro_tracker.json``            snapshot (the old single-file format)
+- ``.macro_tracker.journal``         events appended since the last compaction
+- ``.macro_tracker.journal.sealed``  a journal being folded into the snapshot
+
+- ``.macro_tracker.lock``            advisory lock taken by every writer
+
+Events carry an increasing ``seq`` and the snapshot records the last one it
+contains, so a crash at any point of a compaction never applies an event twice.
+They also say exactly what changed: ``refresh`` hands the days, profile and
+weights touched since its last call to a long-running reader such as Habit
+Hub, which then updates just those.
+
+Several processes (the CLI, Habit Hub) can write at the same time. Appending
+takes the lock for a few system calls: it reads any events other processes
+appended since this one last looked, applies them to the in-memory data
+(the merge), writes the next seq and lets go. Snapshots are written to a
+temporary file and renamed into place, and a compaction only takes the lock
+for that rename.
+
+Opening the journal backend only looks up the last ``seq``: it is written at
+the very end of the snapshot, so a few bytes from there plus the (short)
+active journal are enough to append. Until something needs the whole history,
+``profile`` and ``daily_log`` decode just their part of the snapshot and
+replay the journal on top, so one-off commands stay fast however much history
+there is.
+"""
+
+import bisect
+import copy
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from macro_store.files import locked, write_atomic, write_temp
+
+BACKENDS = ("journal", "sqlite")
+JSON_FILE = Path.home() / ".macro_tracker.json"
+SQLITE_FILE = Path.home() / ".macro_tracker.db"
+
+COMPACT_EVERY = 500  # journal events before a background compaction
+
+_SEQ_AT_END = re.compile(r'"journal_seq":\s*(\d+)\s*\}\s*$')
+_DECODER = json.JSONDecoder()
+
+DEFAULT_DATA = {
+    "profile": {
+        "name": "",
+        "age": 0,
+        "height": 0,
+        "weight": 0,
+        "goal": "maintain",  # lose, maintain, gain
+        "daily_calories": 2000,
+        "daily_protein": 150,
+        "daily_carbs": 200,
+        "daily_fat": 65
+    },
+    "weight_history": [],
+    "daily_logs": {}
+}
+
+
+def empty_data():
+    """Fresh data for a first run"""
+    return copy.deepcopy(DEFAULT_DATA)
+
+
+def apply_event(data, event):
+    """Apply one journal event to the in-memory data"""
+    kind = event["type"]
+    if kind == "profile_set":
+        data["profile"] = dict(event["profile"])
+    elif kind == "weight_logged":
+        # The history stays in date order. Only a weigh-in on or after the
+        # latest one is the current weight; a back-dated one just fills in.
+        history = data["weight_history"]
+        index = len(history)
+        while index and history[index - 1]["date"] > event["date"]:
+            index -= 1
+        history.insert(index, {"date": event["date"], "weight": event["weight"]})
+        if index == len(history) - 1:
+            data["profile"]["weight"] = event["weight"]
+    elif kind == "food_logged":
+        day = data["daily_logs"].setdefault(event["date"], {
+            "foods": [],
+            "total_calories": 0,
+            "total_protein": 0,
+            "total_carbs": 0,
+            "total_fat": 0
+        })
+        food = event["food"]
+        day["foods"].append(dict(food))
+        day["total_calories"] += food["calories"]
+        day["total_protein"] += food["protein"]
+        day["total_carbs"] += food["carbs"]
+        day["total_fat"] += food["fat"]
+    else:
+        raise ValueError(f"Unknown journal event: {kind}")
+    return data
+
+
+class Changes:
+    """What changed since the last ``refresh``; false if nothing did
+
+    ``days`` holds the days whose food log changed. ``everything`` is set when
+    the data had to be read again from scratch, so anything may have changed.
+    """
+
+    def __init__(self):
+        self.days = set()
+        self.profile = False
+        self.weights = False
+        self.everything = False
+
+    def __bool__(self):
+        return bool(self.days or self.profile or self.weights or self.everything)
+
+    def __repr__(self):
+        return (f"Changes(days={sorted(self.days)}, profile={self.profile}, "
+                f"weights={self.weights}, everything={self.everything})")
+
+    def add(self, event):
+        """Note what one journal event changes"""
+        kind = event["type"]
+        if kind == "food_logged":
+            self.days.add(event["date"])
+        elif kind == "weight_logged":
+            self.weights = True
+            self.profile = True  # the current weight is part of the profile
+        elif kind == "profile_set":
+            self.profile = True
+
+
+def _read_snapshot(path):
+    """Return (data, last seq) from a snapshot, or empty data if there is none
+
+    A snapshot that exists but cannot be read raises instead. Loading it as
+    empty data would let the next compaction or checkpoint write that empty
+    state over the real history.
+    """
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return empty_data(), 0
+    except ValueError as error:
+        raise ValueError(
+            f"{path} is not a valid snapshot ({error}); nothing was changed. "
+            "Restore it from a backup or move it aside to start empty."
+        ) from error
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} is not a valid snapshot; nothing was changed")
+    seq = data.pop("journal_seq", 0)
+    return data, seq
+
+
+def _snapshot_seq(path):
+    """The seq at the end of a snapshot, 0 without one, or None if not found there"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 64))
+            tail = f.read()
+    except FileNotFoundError:
+        return 0
+    match = _SEQ_AT_END.search(tail.decode(errors="replace"))
+    return int(match.group(1)) if match else None
+
+
+def _line_seq(line):
+    # Lines are written as {"seq":N,... so most can be skipped undecoded.
+    if line.startswith(b'{"seq":'):
+        end = line.find(b",", 7)
+        if end > 7 and line[7:end].isdigit():
+            return int(line[7:end])
+    return None
+
+
+def _read_journal(path, repair=False, after=0):
+    """Return (events with a seq above ``after``, complete lines) of a journal file.
+
+    A last line without a newline is a write that was cut off (or is still
+    being written by another process); with ``repair``, which needs the lock,
+    it is trimmed so the next append starts on a clean line.
+    """
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return [], 0
+    complete = raw.rfind(b"\n") + 1
+    if repair and complete < len(raw):
+        os.truncate(path, complete)
+    lines = raw[:complete].splitlines()
+    events = []
+    for line in lines:
+        seq = _line_seq(line)
+        if seq is not None and seq <= after:
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if event["seq"] > after:
+            events.append(event)
+    return events, len(lines)
+
+
+def _encode_snapshot(data, seq):
+    # Compact on purpose: with ``indent`` the json module falls back to its
+    # pure-Python encoder, which is several times slower on large histories.
+    return json.dumps({**data, "journal_seq": seq}, separators=(",", ":"))
+
+
+class JournalStorage:
+    def __init__(self, snapshot_file):
+        self.snapshot_file = Path(snapshot_file)
+        self.journal_file = self.snapshot_file.with_suffix(".journal")
+        self.sealed_file = self.snapshot_file.with_suffix(".journal.sealed")
+        self.lock_file = self.snapshot_file.with_suffix(".lock")
+        self.compaction_lock_file = self.snapshot_file.with_suffix(".compaction.lock")
+        self.seq = 0
+        self.pending = 0  # events in the active journal
+        self._compactor = None
+        self.data = None
+        self._tail = []  # events not in the snapshot, while ``data`` is not loaded
+        self._changes = Changes()  # since the last ``refresh``
+        self._days = None  # sorted keys of daily_logs, see ``logged_days``
+
+    def attach(self):
+        """Find the last seq so events can be appended; the data is read on first use"""
+        snapshot_seq = _snapshot_seq(self.snapshot_file)
+        if snapshot_seq is None or self.sealed_file.exists():
+            # An older snapshot, or a compaction to finish: take the slow path.
+            self.load()
+            return
+        self.data = None
+        self.seq = snapshot_seq
+        self._tail = []
+        with self._synced():
+            pass
+
+    def load(self):
+        """Read the snapshot and replay any journal events newer than it"""
+        self.close()
+        self.data, self.seq = _read_snapshot(self.snapshot_file)
+        self._tail = []
+        with self._synced():
+            pass
+        if self.sealed_file.exists():
+            # A compaction was interrupted; finish it (unless another process
+            # is already on it).
+            self._start_compaction()
+        return self.data
+
+    def refresh(self):
+        """Pick up changes made by other processes
+
+        Returns the ``Changes`` since the last call, this process's own
+        writes included, so a reader can update just what they touched.
+        """
+        with self._synced():
+            pass
+        changes, self._changes = self._changes, Changes()
+        return changes
+
+    def data_files(self):
+        """The files that change whenever the data does, for watching"""
+        return [self.snapshot_file, self.journal_file, self.sealed_file]
+
+    @contextmanager
+    def _synced(self):
+        """Hold the lock, with everything other writers appended applied
+
+        Parsing a snapshot can take a while on a long history, so when one
+        has to be read again it is done without the lock, and then the lock
+        is taken again (optimistically expecting no further compaction in
+        between).
+        """
+        while True:
+            with locked(self.lock_file):
+                if self._catch_up():
+                    yield
+                    return
+            self._reread()
+
+    def _catch_up(self):
+        """Apply the events other writers appended since this process last looked
+
+        Needs the lock. Seqs are handed out one at a time under the lock, so
+        new events follow on from ``self.seq`` without gaps. A gap, or a
+        snapshot newer than ``self.seq``, means events were folded into the
+        snapshot meanwhile: nothing is applied and None is returned, and the
+        snapshot has to be read again. Returns True otherwise.
+        """
+        snapshot_seq = _snapshot_seq(self.snapshot_file) or 0
+        sealed, _ = _read_journal(self.sealed_file, after=self.seq)
+        active, self.pending = _read_journal(self.journal_file, repair=True, after=self.seq)
+        events = sealed + active
+        if snapshot_seq > self.seq or any(
+            event["seq"] != self.seq + i for i, event in enumerate(events, 1)
+        ):
+            return False
+        for event in events:
+            self._apply(event)
+        return True
+
+    def _reread(self):
+        # Without the lock: a torn last line may be a write in progress.
+        # Which events were folded into the snapshot is not known any more.
+        self._changes.everything = True
+        snapshot_seq = _snapshot_seq(self.snapshot_file) if self.data is None else None
+        if snapshot_seq is None:
+            self.data, self.seq = _read_snapshot(self.snapshot_file)
+        else:
+            self.seq = snapshot_seq
+        self._tail = []
+        sealed, _ = _read_journal(self.sealed_file, after=self.seq)
+        active, self.pending = _read_journal(self.journal_file, after=self.seq)
+        for event in sealed + active:
+            if event["seq"] != self.seq + 1:
+                break  # folded away meanwhile; the locked catch-up notices
+            self._apply(event)
+
+    def _apply(self, event):
+        if self.data is not None:
+            apply_event(self.data, event)
+        else:
+            self._tail.append(event)
+        self.seq = event["seq"]
+        self._changes.add(event)
+
+    def _loaded(self):
+        if self.data is None:
+            self.load()
+        return self.data
+
+    def _partial(self, day=None):
+        """The profile and one day's log, decoded from the snapshot on their own
+
+        The weight history is decoded as well when the journal holds a weigh-in.
+        """
+        if self.data is not None:
+            return self.data
+        try:
+            text = self.snapshot_file.read_text()
+        except FileNotFoundError:
+            text = ""
+        head = '{"profile":'
+        match = _SEQ_AT_END.search(text[-64:])
+        if text and not (text.startswith(head) and match):
+            return self._loaded()
+        data = empty_data()
+        snapshot_seq = 0
+        weighed = any(event["type"] == "weight_logged" for event in self._tail)
+        if text:
+            data["profile"], end = _DECODER.raw_decode(text, len(head))
+            snapshot_seq = int(match.group(1))
+            if weighed:
+                # A new weigh-in is only the current weight if it is not
+                # back-dated, which takes the history it is compared with.
+                key = ',"weight_history":'
+                if not text.startswith(key, end):
+                    return self._loaded()
+                data["weight_history"] = _DECODER.raw_decode(text, end + len(key))[0]
+            # Keys are written without spaces and quotes inside strings are
+            # escaped, so this can only match the day's key in daily_logs.
+            start = text.find(f'"{day}":{{') if day else -1
+            if start >= 0:
+                data["daily_logs"][day] = _DECODER.raw_decode(text, start + len(day) + 3)[0]
+        for event in self._tail:
+            if event["seq"] > snapshot_seq and (event["type"] != "food_logged" or event["date"] == day):
+                apply_event(data, event)
+        return data
+
+    def profile(self):
+        return self._partial()["profile"]
+
+    def set_profile(self, profile):
+        self._record({"type": "profile_set", "profile": profile})
+
+    def log_weight(self, day, weight):
+        self._record({"type": "weight_logged", "date": day, "weight": weight})
+
+    def weight_history(self, limit=None):
+        """The last ``limit`` weigh-ins (all of them for None), oldest first"""
+        history = self._loaded()["weight_history"]
+        return history[-limit:] if limit else list(history)
+
+    def log_food(self, day, food):
+        self._record({"type": "food_logged", "date": day, "food": food})
+
+    def daily_log(self, day):
+        return self._partial(day)["daily_logs"].get(day)
+
+    def logged_days(self, before=None, limit=None):
+        """Up to ``limit`` days with food logged before ``before`` (all days for None), newest first"""
+        logs = self._loaded()["daily_logs"]
+        # Days are only ever added, so the sorted list is current as long as
+        # the number of days is.
+        if self._days is None or len(self._days) != len(logs):
+            self._days = sorted(logs)
+        end = len(self._days) if before is None else bisect.bisect_left(self._days, before)
+        start = 0 if limit is None else max(0, end - limit)
+        return self._days[start:end][::-1]
+
+    def iter_foods(self):
+        """Yield (day, food) for every food ever logged, oldest first"""
+        logs = self._loaded()["daily_logs"]
+        for day in sorted(logs):
+            for food in logs[day]["foods"]:
+                yield day, food
+
+    def iter_daily_totals(self):
+        """Yield (day, calories, protein, carbs, fat) for every logged day, oldest first"""
+        logs = self._loaded()["daily_logs"]
+        for day in sorted(logs):
+            log = logs[day]
+            yield day, log["total_calories"], log["total_protein"], log["total_carbs"], log["total_fat"]
+
+    def version(self):
+        """A number that changes whenever the data does"""
+        return self.seq
+
+    def import_foods(self, rows, import_id=None):
+        """Add many (day, food) rows and write the result as one new snapshot
+
+        Totals of the touched days are recomputed from their foods once all
+        rows are in. Nothing is written if ``rows`` raises part way through.
+        This is the one write that holds the lock while the snapshot is
+        written; other writers wait for it to finish.
+
+        An ``import_id`` is kept in the snapshot's ``imports`` list, written
+        with the rows. Returns None, and adds nothing, if that id was
+        already merged.
+        """
+        added = {}
+        for day, food in rows:
+            added.setdefault(day, []).append(food)
+        self._loaded()
+        self.close()
+        with self._synced():
+            if import_id is not None:
+                imports = self.data.setdefault("imports", [])
+                if import_id in imports:
+                    return None
+                imports.append(import_id)
+            logs = self.data["daily_logs"]
+            for day, foods in added.items():
+                log = logs.setdefault(day, {"foods": []})
+                log["foods"].extend(foods)
+                for macro in ("calories", "protein", "carbs", "fat"):
+                    log[f"total_{macro}"] = sum(food[macro] for food in log["foods"])
+            self._changes.days.update(added)
+            self._write_checkpoint()
+        return len(added)
+
+    def checkpoint(self):
+        """Write everything to the snapshot now and start an empty journal"""
+        self._loaded()
+        self.close()
+        with self._synced():
+            self._write_checkpoint()
+
+    def _write_checkpoint(self):
+        self.seq += 1
+        write_atomic(self.snapshot_file, _encode_snapshot(self.data, self.seq))
+        self.journal_file.unlink(missing_ok=True)
+        self.sealed_file.unlink(missing_ok=True)
+        self.pending = 0
+
+    def _record(self, event):
+        """Durably add one event to the journal and return it with its seq
+
+        Under the lock, events from other processes are merged in first so
+        the new one gets the next seq. Then the line is written with a single
+        write on an O_APPEND descriptor, so a line is never interleaved with
+        another and at worst the final line is cut short.
+        """
+        with self._synced():
+            event = {"seq": self.seq + 1, **event}
+            line = (json.dumps(event, separators=(",", ":")) + "\n").encode()
+            fd = os.open(self.journal_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)
+            except BaseException:
+                os.close(fd)
+                raise
+            self._apply(event)
+            self.pending += 1
+        # The flush to disk happens after the lock is released: the order is
+        # already fixed by the seq, and other writers need not wait for it.
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        if self.pending >= COMPACT_EVERY:
+            self.compact()
+        return event
+
+    def compact(self):
+        """Seal the active journal and fold it into the snapshot in the background"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        with locked(self.lock_file):
+            if self.sealed_file.exists() or not self.journal_file.exists():
+                return
+            os.replace(self.journal_file, self.sealed_file)
+            self.pending = 0
+        self._start_compaction()
+
+    def close(self):
+        """Wait for a running compaction to finish"""
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def _start_compaction(self):
+        self._compactor = threading.Thread(target=self._compact, name="macro-tracker-compaction")
+        self._compactor.start()
+
+    def _compact(self):
+        # Works from the files only, so the caller's data is never shared
+        # with this thread. The new snapshot is written beside the old one
+        # without the data lock, which is only taken for the final swap.
+        with locked(self.compaction_lock_file, blocking=False) as acquired:
+            if not acquired:
+                return  # another process is compacting
+            data, base = _read_snapshot(self.snapshot_file)
+            seq = base
+            events, _ = _read_journal(self.sealed_file, after=seq)
+            if not events and not self.sealed_file.exists():
+                return
+            for event in events:
+                apply_event(data, event)
+                seq = event["seq"]
+            tmp = write_temp(self.snapshot_file, _encode_snapshot(data, seq))
+            with locked(self.lock_file):
+                # An import may have replaced the snapshot meanwhile; it
+                # already contains the sealed events then.
+                if (_snapshot_seq(self.snapshot_file) or 0) == base and self.sealed_file.exists():
+                    os.replace(tmp, self.snapshot_file)
+                    self.sealed_file.unlink()
+                    return
+            tmp.unlink()
+
+
+def export_data(store):
+    """All data of any backend in the JSON layout (profile, weight_history, daily_logs)"""
+    daily_logs = {}
+    for day, *totals in store.iter_daily_totals():
+        daily_logs[day] = {
+            "foods": [],
+            **{f"total_{macro}": total for macro, total in zip(("calories", "protein", "carbs", "fat"), totals)}
+        }
+    for day, food in store.iter_foods():
+        daily_logs[day]["foods"].append(food)
+    return {
+        "profile": store.profile(),
+        "weight_history": store.weight_history(),
+        "daily_logs": daily_logs
+    }
+
+
+def open_storage(backend=None):
+    """Open the chosen backend (default: ``MACRO_TRACKER_STORAGE`` or journal)"""
+    backend = backend or os.environ.get("MACRO_TRACKER_STORAGE") or "journal"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend} (choose from {', '.join(BACKENDS)})")
+    if backend == "sqlite":
+        from macro_store.sqlite_storage import SqliteStorage, import_json
+
+        store = SqliteStorage(SQLITE_FILE)
+        if not store.json_imported() and (JSON_FILE.exists() or JournalStorage(JSON_FILE).journal_file.exists()):
+            # First switch to SQLite: bring the JSON history across once. The
+            # database records when that is done, so a failed import is retried.
+            journal = JournalStorage(JSON_FILE)
+            import_json(store, journal.load())
+            journal.close()
+        return store
+    store = JournalStorage(JSON_FILE)
+    store.attach()
+    return store
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the non-interactive commands
+
+    uv run bench_startup.py [--years 5] [--runs 20] [--storage sqlite]
+
+Builds a scratch home directory with years of history, then times fresh
+``main.py`` processes for each command and prints JSON with the median and
+the slowest run. The budget (``BUDGET_MS``) applies to what the tracker adds
+on top of a bare ``python -c pass``, so that Python's own startup on the
+machine is not counted. Exits with status 1 if a command is over budget.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BUDGET_MS = 50
+HERE = Path(__file__).resolve().parent
+
+COMMANDS = {
+    "log-food": ["log-food", "Bench oats", "--calories", "380", "--protein", "13"],
+    "log-food (reuse)": ["log-food", "bench"],
+    "log-weight": ["log-weight", "72.4"],
+    "summary": ["summary"],
+}
+
+
+def _populate(home, years, backend):
+    """Write ``years`` of history with a few foods a day into ``home``"""
+    env = {**os.environ, "HOME": str(home)}
+    script = f"""
+import random
+from datetime import date, timedelta
+from macro_store import open_storage
+from catalog import FoodCatalog
+
+random.seed(1)
+foods = ["Oats", "Chicken breast", "Rice", "Greek yogurt", "Banana", "Salmon", "Eggs", "Broccoli"]
+start = date.today() - timedelta(days={years * 365})
+rows = []
+for offset in range({years * 365}):
+    day = (start + timedelta(days=offset)).isoformat()
+    for name in random.sample(foods, 4):
+        rows.append((day, {{"name": name, "calories": random.randint(100, 600), "protein": 20.0,
+                            "carbs": 40.0, "fat": 10.0, "quantity": "1 serving", "time": "12:00"}}))
+store = open_storage({backend!r})
+store.import_foods(rows)
+for offset in range(0, {years * 365}, 3):
+    store.log_weight((start + timedelta(days=offset)).isoformat(), round(80 - offset / 500, 1))
+FoodCatalog.open(store).save(store)
+store.close()
+"""
+    subprocess.run([sys.executable, "-c", script], cwd=HERE, env=env, check=True)
+
+
+def _time(argv, env, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(argv, cwd=HERE, env=env, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--years", type=int, default=5, help="years of history to generate")
+    parser.add_argument("--runs", type=int, default=20, help="processes started per command")
+    parser.add_argument("--storage", choices=("journal", "sqlite"), default="journal")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        _populate(Path(home), args.years, args.storage)
+        env = {**os.environ, "HOME": home, "MACRO_TRACKER_STORAGE": args.storage}
+        baseline = statistics.median(_time([sys.executable, "-c", "pass"], env, args.runs))
+        results = []
+        for name, command in COMMANDS.items():
+            timings = _time([sys.executable, "main.py", *command], env, args.runs)
+            median = statistics.median(timings)
+            results.append({
+                "command": name,
+                "median_ms": round(median, 1),
+                "max_ms": round(max(timings), 1),
+                "over_python_ms": round(median - baseline, 1),
+                "within_budget": median - baseline < BUDGET_MS
+            })
+
+    print(json.dumps({
+        "benchmark": "startup",
+        "storage": args.storage,
+        "years": args.years,
+        "python_ms": round(baseline, 1),
+        "budget_ms": BUDGET_MS,
+        "results": results
+    }, indent=2))
+    if not all(result["within_budget"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Personal food catalog for quick re-logging
+
+Every distinct food you have logged (matched case-insensitively by name)
+keeps its latest macros and quantity, a use count and a frecency score. The
+score gains 1 per use and halves every ``HALF_LIFE_DAYS``, so foods you eat
+often and recently come first.
+
+Lookups go through a sorted list of (term, key) pairs, where the terms are
+the name from each word onwards ("greek yogurt" and "yogurt"). A prefix
+search is then a bisect plus a short scan.
+
+The catalog is cached in ``~/.macro_tracker.catalog.json`` together with the
+storage version it reflects. It is only rebuilt from the full history when
+that version no longer matches, e.g. after the data was changed elsewhere.
+"""
+
+import bisect
+import json
+from datetime import date
+from pathlib import Path
+
+from macro_store import write_atomic
+
+CATALOG_FILE = Path.home() / ".macro_tracker.catalog.json"
+CATALOG_FORMAT = 1
+HALF_LIFE_DAYS = 30
+MACROS = ("calories", "protein", "carbs", "fat")
+
+
+def _key(name):
+    return " ".join(name.lower().split())
+
+
+def _terms(key):
+    words = key.split(" ")
+    return {" ".join(words[i:]) for i in range(len(words))}
+
+
+def _decayed(entry, today):
+    return entry["score"] * 0.5 ** ((today - entry["score_day"]) / HALF_LIFE_DAYS)
+
+
+class FoodCatalog:
+    def __init__(self, path=CATALOG_FILE):
+        self.path = Path(path)
+        self.foods = {}
+        self._index = []
+        self._dirty = False
+        self._saved_stamp = None
+        self._version = None
+        self._in_step = True
+
+    @classmethod
+    def open(cls, store, path=CATALOG_FILE, rebuild=True):
+        """Load the cached catalog, rebuilding it if it is out of date with ``store``
+
+        With ``rebuild=False`` an out of date catalog is not rebuilt from the
+        full history and None is returned instead.
+        """
+        catalog = cls(path)
+        catalog._version = store.version()
+        stamp = catalog._stamp(store)
+        try:
+            with open(catalog.path, 'r') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = None
+        if cached is not None and cached.get("stamp") == stamp:
+            catalog._saved_stamp = stamp
+            catalog.foods = {_key(entry["name"]): entry for entry in cached["foods"]}
+            catalog._index = sorted(
+                (term, key) for key in catalog.foods for term in _terms(key)
+            )
+        elif not rebuild:
+            return None
+        else:
+            for day, food in store.iter_foods():
+                catalog.add(food, day)
+        return catalog
+
+    def add(self, food, day, store=None):
+        """Record one use of ``food`` on ``day`` (ISO date)
+
+        Pass ``store`` when the food was just logged to it, so the catalog
+        can tell whether it still reflects every food in ``store``.
+        """
+        if store is not None:
+            self.track(store)
+        key = _key(food["name"])
+        if not key:
+            return
+        used = date.fromisoformat(day).toordinal()
+        entry = self.foods.get(key)
+        if entry is None:
+            entry = self.foods[key] = {"count": 0, "score": 0.0, "score_day": used, "last_used": day}
+            for term in _terms(key):
+                bisect.insort(self._index, (term, key))
+        if used >= entry["score_day"]:
+            entry["score"] = _decayed(entry, used) + 1
+            entry["score_day"] = used
+        else:
+            # An older entry, e.g. while building from history out of order.
+            entry["score"] += 0.5 ** ((entry["score_day"] - used) / HALF_LIFE_DAYS)
+        entry["count"] += 1
+        if day >= entry["last_used"]:
+            entry["last_used"] = day
+            entry["name"] = food["name"]
+            entry["quantity"] = food.get("quantity", "1 serving")
+            for macro in MACROS:
+                entry[macro] = food[macro]
+        self._dirty = True
+
+    def search(self, prefix, limit=5, today=None):
+        """Foods whose name, or a word in it, starts with ``prefix``; best first"""
+        prefix = _key(prefix)
+        if not prefix:
+            return []
+        keys = set()
+        start = bisect.bisect_left(self._index, (prefix,))
+        for term, key in self._index[start:]:
+            if not term.startswith(prefix):
+                break
+            keys.add(key)
+        today = (today or date.today()).toordinal()
+        ranked = sorted(keys, key=lambda k: (-_decayed(self.foods[k], today), k))
+        return [self.foods[key] for key in ranked[:limit]]
+
+    def track(self, store):
+        """Note one write this process just made to ``store``
+
+        The stamp only follows ``store`` while its version moves by exactly
+        this process's writes. Once another process has written too, the
+        catalog may be missing foods, so it keeps its old stamp and the next
+        ``open`` rebuilds it.
+        """
+        version = store.version()
+        if self._in_step and version == self._version + 1:
+            self._version = version
+        else:
+            self._in_step = False
+
+    def save(self, store):
+        """Write the catalog to disk if it or the storage version it reflects changed"""
+        stamp = self._stamp(store)
+        if not self._dirty and stamp == self._saved_stamp:
+            return
+        write_atomic(self.path, json.dumps({
+            "stamp": stamp,
+            "foods": list(self.foods.values())
+        }))
+        self._dirty = False
+        self._saved_stamp = stamp
+
+    def _stamp(self, store):
+        return [CATALOG_FORMAT, type(store).__name__, self._version]
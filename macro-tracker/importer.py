@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Import food logs from other trackers' CSV exports
+
+    uv run importer.py export.csv [--map name="Food Name"] [--date-format %d/%m/%Y]
+
+The CSV is read one row at a time and parsed rows go to a staging database
+(``~/.macro_tracker.import.db``) in chunks. Each chunk commits together with
+the byte offset reached in the CSV. If the import is interrupted, running the
+same command again continues from the last chunk. Once the whole file is
+staged, the rows are merged into your data in a single write. Day totals
+are recomputed there in bulk. The merge records the staging run's import id
+in the same write, so a crash before the staging database is removed never
+merges the rows twice.
+
+Columns are matched by common header names (MyFitnessPal, Cronometer,
+LoseIt style). Use ``--map field=Header`` when a header is not recognised.
+"""
+
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from macro_store import BACKENDS, open_storage
+
+STAGING_FILE = Path.home() / ".macro_tracker.import.db"
+CHUNK_ROWS = 10_000
+
+FIELDS = ("date", "time", "name", "calories", "protein", "carbs", "fat", "quantity")
+HEADER_NAMES = {
+    "date": ("date", "day", "date logged", "logged at", "datetime"),
+    "time": ("time", "time logged"),
+    "name": ("food", "food name", "name", "description", "item", "food item"),
+    "calories": ("calories", "energy (kcal)", "kcal", "energy", "calories (kcal)"),
+    "protein": ("protein", "protein (g)"),
+    "carbs": ("carbs", "carbs (g)", "carbohydrates", "carbohydrates (g)", "total carbs"),
+    "fat": ("fat", "fat (g)", "total fat", "total fat (g)"),
+    "quantity": ("quantity", "amount", "serving", "serving size", "servings"),
+}
+DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d", "%d %b %Y", "%b %d %Y", "%B %d, %Y")
+TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M:%S %p", "%I:%M%p")
+
+STAGING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS rows (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    name TEXT NOT NULL,
+    calories REAL NOT NULL,
+    protein REAL NOT NULL,
+    carbs REAL NOT NULL,
+    fat REAL NOT NULL,
+    quantity TEXT NOT NULL
+);
+"""
+
+
+class _Lines:
+    """Decoded lines of a binary file that remember the byte offset reached"""
+
+    def __init__(self, f, offset):
+        f.seek(offset)
+        self.f = f
+        self.offset = offset
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode("utf-8-sig" if self.offset == len(line) else "utf-8", errors="replace")
+
+
+def map_columns(header, overrides):
+    """Return {field: column index} for the CSV header"""
+    normalised = {column.strip().lower(): i for i, column in enumerate(header)}
+    columns = {}
+    for field in FIELDS:
+        if field in overrides:
+            name = overrides[field].strip().lower()
+            if name not in normalised:
+                raise ValueError(f"Column '{overrides[field]}' for {field} is not in the CSV header")
+            columns[field] = normalised[name]
+            continue
+        for name in HEADER_NAMES[field]:
+            if name in normalised:
+                columns[field] = normalised[name]
+                break
+    missing = [field for field in ("date", "calories") if field not in columns]
+    if missing:
+        raise ValueError(f"No column found for {', '.join(missing)}; use --map field=Header")
+    return columns
+
+
+# Exports repeat the same few thousand dates and times across millions of
+# rows, and strptime is by far the slowest step per row.
+@lru_cache(maxsize=8192)
+def parse_date(value, date_format=None):
+    """Return (ISO date, HH:MM or None) from a date or date-time cell"""
+    value = value.strip()
+    if date_format:
+        parsed = datetime.strptime(value, date_format)
+        return parsed.date().isoformat(), None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", ""))
+        clock = parsed.strftime("%H:%M") if len(value) > 10 else None
+        return parsed.date().isoformat(), clock
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat(), None
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {value}")
+
+
+@lru_cache(maxsize=4096)
+def parse_time(value):
+    """Return HH:MM, or None if the cell is empty or not a time"""
+    value = value.strip().upper()
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%H:%M")
+        except ValueError:
+            continue
+    return None
+
+
+def _number(value):
+    value = value.strip().replace(",", "")
+    return float(value) if value else 0.0
+
+
+def parse_row(row, columns, date_format=None):
+    """Turn one CSV row into (day, food entry)"""
+    def cell(field):
+        index = columns.get(field)
+        return row[index] if index is not None and index < len(row) else ""
+
+    day, clock = parse_date(cell("date"), date_format)
+    food = {
+        "name": cell("name").strip() or "Imported food",
+        "calories": _number(cell("calories")),
+        "protein": _number(cell("protein")),
+        "carbs": _number(cell("carbs")),
+        "fat": _number(cell("fat")),
+        "quantity": cell("quantity").strip() or "1 serving",
+        "time": parse_time(cell("time")) or clock or "00:00"
+    }
+    return day, food
+
+
+class Staging:
+    def __init__(self, path=STAGING_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(STAGING_SCHEMA)
+
+    def get(self, key, default=None):
+        row = self.db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def put(self, **values):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in values.items()],
+        )
+
+    def reset(self):
+        with self.db:
+            self.db.execute("DELETE FROM state")
+            self.db.execute("DELETE FROM rows")
+
+    def add_rows(self, chunk, **state):
+        """Store a chunk of rows and the progress that goes with it atomically"""
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO rows (date, time, name, calories, protein, carbs, fat, quantity) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((day, *(food[field] for field in FIELDS[1:])) for day, food in chunk),
+            )
+            self.put(**state)
+
+    def iter_rows(self):
+        cursor = self.db.execute(
+            "SELECT date, time, name, calories, protein, carbs, fat, quantity FROM rows ORDER BY date, id"
+        )
+        for row in cursor:
+            yield row[0], {
+                "name": row[2],
+                "calories": row[3],
+                "protein": row[4],
+                "carbs": row[5],
+                "fat": row[6],
+                "quantity": row[7],
+                "time": row[1]
+            }
+
+    def remove(self):
+        self.db.close()
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            Path(str(self.path) + suffix).unlink(missing_ok=True)
+
+
+def _fingerprint(path):
+    stat = path.stat()
+    return [str(path.resolve()), stat.st_size, stat.st_mtime_ns]
+
+
+def _progress(rows, offset, size, started):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    percent = 100 * offset / size if size else 100
+    print(f"\r  {rows:,} rows  {percent:5.1f}%  {rows / elapsed:,.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+
+def stage_csv(path, staging, overrides=None, date_format=None, progress=_progress):
+    """Parse ``path`` into ``staging``, continuing a previous run of the same file"""
+    fingerprint = _fingerprint(path)
+    if staging.get("source") != fingerprint:
+        staging.reset()
+    if staging.get("staged"):
+        return staging.get("rows", 0), staging.get("skipped", 0)
+
+    size = fingerprint[1]
+    offset = staging.get("offset", 0)
+    rows_done = staging.get("rows", 0)
+    skipped = staging.get("skipped", 0)
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        lines = _Lines(f, offset)
+        reader = csv.reader(lines)
+        columns = staging.get("columns")
+        if columns is None:
+            header = next(reader, None)
+            if header is None:
+                raise ValueError("The CSV file is empty")
+            columns = map_columns(header, overrides or {})
+            with staging.db:
+                staging.put(source=fingerprint, columns=columns, offset=lines.offset, date_format=date_format,
+                            import_id=uuid.uuid4().hex)
+        else:
+            date_format = staging.get("date_format")
+
+        chunk = []
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                chunk.append(parse_row(row, columns, date_format))
+            except ValueError:
+                skipped += 1
+                continue
+            if len(chunk) >= CHUNK_ROWS:
+                rows_done += len(chunk)
+                staging.add_rows(chunk, offset=lines.offset, rows=rows_done, skipped=skipped)
+                chunk = []
+                if progress:
+                    progress(rows_done, lines.offset, size, started)
+        rows_done += len(chunk)
+        staging.add_rows(chunk, offset=lines.offset, rows=rows_done, skipped=skipped, staged=True)
+    if progress:
+        progress(rows_done, size, size, started)
+        print(file=sys.stderr)
+    return rows_done, skipped
+
+
+def import_csv(path, backend=None, overrides=None, date_format=None, restart=False, progress=_progress):
+    """Stage and merge a CSV export; returns (rows, skipped, days)
+
+    ``days`` is None when an earlier run had already merged the rows and
+    only the staging database was left to clean up.
+    """
+    staging = Staging()
+    if restart:
+        staging.reset()
+    rows, skipped = stage_csv(Path(path), staging, overrides, date_format, progress)
+    store = open_storage(backend)
+    try:
+        days = store.import_foods(staging.iter_rows(), import_id=staging.get("import_id"))
+    finally:
+        store.close()
+    staging.remove()
+    return rows, skipped, days
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import food logs from a CSV export")
+    parser.add_argument("csv", type=Path, help="CSV file exported from another tracker")
+    parser.add_argument("--map", action="append", default=[], metavar="FIELD=HEADER",
+                        help=f"use HEADER for FIELD ({', '.join(FIELDS)}); repeatable")
+    parser.add_argument("--date-format", help="strptime format of the date column, e.g. %%d/%%m/%%Y")
+    parser.add_argument("--storage", choices=BACKENDS,
+                        help="storage backend (default: $MACRO_TRACKER_STORAGE or journal)")
+    parser.add_argument("--restart", action="store_true", help="discard an unfinished import and start over")
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.map:
+        field, _, header = item.partition("=")
+        if field not in FIELDS or not header:
+            parser.error(f"--map expects FIELD=HEADER with FIELD one of {', '.join(FIELDS)}")
+        overrides[field] = header
+
+    try:
+        rows, skipped, days = import_csv(args.csv, args.storage, overrides, args.date_format, args.restart)
+    except (OSError, ValueError) as exc:
+        parser.exit(1, f"Import failed: {exc}\n")
+    except KeyboardInterrupt:
+        parser.exit(130, "\nInterrupted. Run the same command again to continue.\n")
+    if days is None:
+        print(f"These {rows:,} foods were already imported by the interrupted run; nothing was added")
+        return
+    print(f"Imported {rows:,} foods across {days:,} days ({skipped:,} rows skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Interactive menu of the Macro Tracker
+Started by ``main.py`` when no command is given
+"""
+
+from datetime import datetime, date
+from colorama import Fore, Style, init
+from tabulate import tabulate
+from catalog import FoodCatalog
+from macro_store import open_storage
+
+# Initialize colorama
+init(autoreset=True)
+
+class MacroTracker:
+    def __init__(self, backend=None):
+        self.storage = open_storage(backend)
+        self.catalog = FoodCatalog.open(self.storage)
+    
+    def close(self):
+        """Save the food catalog and close storage"""
+        self.catalog.save(self.storage)
+        self.storage.close()
+    
+    def display_header(self):
+        """Display the main header"""
+        print(Fore.CYAN + "=" * 60)
+        print(Fore.CYAN + "🏋️  MACRO TRACKER")
+        print(Fore.CYAN + "=" * 60)
+        print()
+    
+    def setup_profile(self):
+        """Setup user profile"""
+        print(Fore.YELLOW + "👤 SETUP YOUR PROFILE")
+        print("-" * 30)
+        
+        name = input("Name: ").strip()
+        age = int(input("Age: ") or "25")
+        height = float(input("Height (cm): ") or "170")
+        weight = float(input("Current weight (kg): ") or "70")
+        
+        print("\nGoals:")
+        print("1. Lose weight")
+        print("2. Maintain weight")
+        print("3. Gain weight")
+        goal_choice = input("Choose goal (1-3): ").strip()
+        goals = {"1": "lose", "2": "maintain", "3": "gain"}
+        goal = goals.get(goal_choice, "maintain")
+        
+        # Calculate basic macros (simplified)
+        daily_calories = int(weight * 30)  # Rough estimate
+        daily_protein = int(weight * 2)    # 2g per kg
+        daily_carbs = int(daily_calories * 0.4 / 4)  # 40% of calories
+        daily_fat = int(daily_calories * 0.25 / 9)   # 25% of calories
+        
+        self.storage.set_profile({
+            "name": name,
+            "age": age,
+            "height": height,
+            "weight": weight,
+            "goal": goal,
+            "daily_calories": daily_calories,
+            "daily_protein": daily_protein,
+            "daily_carbs": daily_carbs,
+            "daily_fat": daily_fat
+        })
+        self.catalog.track(self.storage)
+        
+        print(f"\n{Fore.GREEN}✅ Profile setup complete!")
+    
+    def log_weight(self):
+        """Log current weight"""
+        print(Fore.BLUE + "⚖️  LOG WEIGHT")
+        print("-" * 30)
+        
+        weight = float(input("Current weight (kg): "))
+        today = date.today().isoformat()
+        
+        # Updates the profile weight and adds to weight history
+        self.storage.log_weight(today, weight)
+        self.catalog.track(self.storage)
+        
+        print(f"\n{Fore.GREEN}✅ Weight logged: {weight} kg")
+    
+    def log_food(self):
+        """Log food intake"""
+        print(Fore.GREEN + "🍎 LOG FOOD")
+        print("-" * 30)
+        
+        food_name = input("Food name: ").strip()
+        previous = self.pick_previous_food(food_name)
+        if previous:
+            food_name = previous["name"]
+            calories = previous["calories"]
+            protein = previous["protein"]
+            carbs = previous["carbs"]
+            fat = previous["fat"]
+            quantity = previous["quantity"]
+        else:
+            calories = float(input("Calories: ") or "0")
+            protein = float(input("Protein (g): ") or "0")
+            carbs = float(input("Carbs (g): ") or "0")
+            fat = float(input("Fat (g): ") or "0")
+            quantity = input("Quantity (e.g., '1 cup', '100g'): ").strip() or "1 serving"
+        
+        today = date.today().isoformat()
+        
+        food_entry = {
+            "name": food_name,
+            "calories": calories,
+            "protein": protein,
+            "carbs": carbs,
+            "fat": fat,
+            "quantity": quantity,
+            "time": datetime.now().strftime("%H:%M")
+        }
+        
+        # Creates today's log if needed and adds to the totals
+        self.storage.log_food(today, food_entry)
+        self.catalog.add(food_entry, today, self.storage)
+        
+        print(f"\n{Fore.GREEN}✅ {food_name} logged!")
+    
+    def pick_previous_food(self, query):
+        """Offer matching foods from the catalog and return the one picked"""
+        matches = self.catalog.search(query)
+        if not matches:
+            return None
+        
+        print(f"\n{Fore.CYAN}Previously logged:")
+        for i, food in enumerate(matches, 1):
+            print(f"{i}. {food['name']} ({food['quantity']}) - {food['calories']} cal, "
+                  f"P {food['protein']}g, C {food['carbs']}g, F {food['fat']}g")
+        choice = input(f"Reuse one (1-{len(matches)}) or press Enter for a new food: ").strip()
+        if choice.isdigit() and 1 <= int(choice) <= len(matches):
+            return matches[int(choice) - 1]
+        return None
+    
+    def view_daily_summary(self):
+        """View today's summary"""
+        today = date.today().isoformat()
+        
+        print(Fore.MAGENTA + "📊 TODAY'S SUMMARY")
+        print("-" * 30)
+        
+        daily = self.storage.daily_log(today)
+        if daily is None:
+            print("No food logged today.")
+            return
+        
+        profile = self.storage.profile()
+        
+        # Display totals vs goals
+        print(f"Calories: {daily['total_calories']}/{profile['daily_calories']}")
+        print(f"Protein:  {daily['total_protein']:.1f}g/{profile['daily_protein']}g")
+        print(f"Carbs:    {daily['total_carbs']:.1f}g/{profile['daily_carbs']}g")
+        print(f"Fat:      {daily['total_fat']:.1f}g/{profile['daily_fat']}g")
+        
+        # Show remaining
+        remaining_calories = profile['daily_calories'] - daily['total_calories']
+        remaining_protein = profile['daily_protein'] - daily['total_protein']
+        remaining_carbs = profile['daily_carbs'] - daily['total_carbs']
+        remaining_fat = profile['daily_fat'] - daily['total_fat']
+        
+        print(f"\n{Fore.YELLOW}Remaining:")
+        print(f"Calories: {remaining_calories}")
+        print(f"Protein:  {remaining_protein:.1f}g")
+        print(f"Carbs:    {remaining_carbs:.1f}g")
+        print(f"Fat:      {remaining_fat:.1f}g")
+        
+        # Show food list
+        if daily['foods']:
+            print(f"\n{Fore.CYAN}Foods logged today:")
+            for food in daily['foods']:
+                print(f"• {food['name']} ({food['quantity']}) - {food['calories']} cal at {food['time']}")
+    
+    def view_weight_history(self):
+        """View weight history"""
+        print(Fore.BLUE + "📈 WEIGHT HISTORY")
+        print("-" * 30)
+        
+        # Show last 10 entries
+        recent_weights = self.storage.weight_history(10)
+        if not recent_weights:
+            print("No weight data available.")
+            return
+        
+        table_data = []
+        for entry in recent_weights:
+            table_data.append([
+                entry["date"],
+                f"{entry['weight']} kg"
+            ])
+        
+        print(tabulate(table_data, headers=["Date", "Weight"], tablefmt="grid"))
+    
+    def view_trends(self):
+        """View weekly and monthly averages and the weight trend"""
+        from rollups import load_rollups  # NumPy is only needed here
+        
+        print(Fore.MAGENTA + "📅 TRENDS")
+        print("-" * 30)
+        
+        rollups = load_rollups(self.storage)
+        if not rollups["weekly"] and not rollups["weight"]:
+            print("Nothing logged yet.")
+            return
+        
+        headers = ["Start", "Days", "Calories", "Protein", "Carbs", "Fat", "On target", "Protein hit"]
+        for title, rows in (("Last 8 weeks", rollups["weekly"][-8:]), ("Last 6 months", rollups["monthly"][-6:])):
+            if not rows:
+                continue
+            print(f"\n{Fore.CYAN}{title} (daily averages):")
+            print(tabulate([[
+                row["start"],
+                row["days"],
+                f"{row['calories']:.0f}",
+                f"{row['protein']:.1f}g",
+                f"{row['carbs']:.1f}g",
+                f"{row['fat']:.1f}g",
+                f"{row['adherence']:.0f}%",
+                f"{row['protein_hit']:.0f}%"
+            ] for row in rows], headers=headers, tablefmt="grid"))
+        
+        weight = rollups["weight"]
+        if weight:
+            latest = weight["latest"]
+            print(f"\n{Fore.CYAN}Weight trend: {latest['trend']} kg (last weigh-in {latest['weight']} kg on {latest['date']})")
+            if weight["rate_per_week"] is not None:
+                print(f"Changing by {weight['rate_per_week']:+.2f} kg per week")
+    
+    def show_menu(self):
+        """Display the main menu"""
+        while True:
+            self.display_header()
+            
+            # Show profile info if set up
+            profile = self.storage.profile()
+            if profile["name"]:
+                print(f"Welcome, {profile['name']}! Current weight: {profile['weight']} kg")
+                print()
+            
+            print(Fore.WHITE + "🎯 WHAT WOULD YOU LIKE TO DO?")
+            print("-" * 30)
+            print("1. Setup profile")
+            print("2. Log weight")
+            print("3. Log food")
+            print("4. View today's summary")
+            print("5. View weight history")
+            print("6. View trends")
+            print("7. Exit")
+            print()
+            
+            choice = input("Enter your choice (1-7): ").strip()
+            
+            if choice == "1":
+                self.setup_profile()
+                input("\nPress Enter to continue...")
+            elif choice == "2":
+                self.log_weight()
+                input("\nPress Enter to continue...")
+            elif choice == "3":
+                self.log_food()
+                input("\nPress Enter to continue...")
+            elif choice == "4":
+                self.view_daily_summary()
+                input("\nPress Enter to continue...")
+            elif choice == "5":
+                self.view_weight_history()
+                input("\nPress Enter to continue...")
+            elif choice == "6":
+                self.view_trends()
+                input("\nPress Enter to continue...")
+            elif choice == "7":
+                print(f"\n{Fore.GREEN}👋 Keep tracking those macros! See you next time!")
+                break
+            else:
+                print(f"\n{Fore.RED}❌ Invalid choice. Please try again.")
+                input("Press Enter to continue...")
+            
+            # Clear screen for next iteration (an escape code instead of
+            # spawning a shell; colorama translates it on Windows)
+            print("\033[2J\033[H", end="", flush=True)
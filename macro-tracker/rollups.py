@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Long-term rollups of the food log and weight history
+
+    uv run rollups.py [--json] [--storage sqlite]
+
+Day totals and weigh-ins are loaded into NumPy arrays once, then every figure
+is computed over the whole arrays at the same time:
+
+- weekly (Monday start) and monthly averages of calories and macros over the
+  days that have food logged
+- adherence: the share of those days with calories within ``ON_TARGET`` of
+  the profile target, and the share that reached the protein target
+- a weight trend, smoothed exponentially so a single weigh-in moves it by
+  ``TREND_SMOOTHING``, and its rate of change over the last
+  ``TREND_WINDOW_DAYS``
+
+Results are cached in ``~/.macro_tracker.rollups.json`` together with the
+storage version they were computed from. They are only recomputed once that
+version changes.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from macro_store import BACKENDS, open_storage, write_atomic
+
+ROLLUPS_FILE = Path.home() / ".macro_tracker.rollups.json"
+ROLLUPS_FORMAT = 1
+MACROS = ("calories", "protein", "carbs", "fat")
+
+ON_TARGET = 0.10         # calories within 10% of the target count as on target
+TREND_SMOOTHING = 0.1    # weight given to each day's reading in the trend
+TREND_WINDOW_DAYS = 28   # days used for the trend's rate of change
+
+# The smoothing below multiplies by (1 - TREND_SMOOTHING) ** -n within a
+# block of days; blocks are kept short enough that this stays below e**30.
+_MAX_EXPONENT = 30.0
+
+_memo = None  # (stamp, rollups) of the last call in this process
+
+
+def _day_arrays(store):
+    """Return (days as datetime64[D], totals as an (n, 4) float array)"""
+    rows = list(store.iter_daily_totals())
+    days = np.array([row[0] for row in rows], dtype="datetime64[D]")
+    totals = np.array([row[1:] for row in rows], dtype=float).reshape(-1, len(MACROS))
+    return days, totals
+
+
+def _group(labels, totals, targets):
+    """Average ``totals`` per distinct label and measure adherence per label"""
+    keys, groups = np.unique(labels, return_inverse=True)
+    days = np.bincount(groups)
+    sums = np.stack([np.bincount(groups, weights=totals[:, i], minlength=len(keys))
+                     for i in range(len(MACROS))], axis=1)
+    averages = sums / days[:, None]
+    calories, protein = totals[:, 0], totals[:, 1]
+    on_target = np.abs(calories - targets[0]) <= ON_TARGET * targets[0]
+    adherence = np.bincount(groups, weights=on_target, minlength=len(keys)) / days
+    protein_hit = np.bincount(groups, weights=protein >= targets[1], minlength=len(keys)) / days
+    return keys, days, averages, adherence, protein_hit
+
+
+def _rows(starts, days, averages, adherence, protein_hit):
+    return [
+        {
+            "start": str(start),
+            "days": int(count),
+            **{macro: round(float(value), 1) for macro, value in zip(MACROS, average)},
+            "adherence": round(float(on) * 100, 1),
+            "protein_hit": round(float(hit) * 100, 1),
+        }
+        for start, count, average, on, hit in zip(starts, days, averages, adherence, protein_hit)
+    ]
+
+
+def ewma(values, alpha):
+    """Exponentially smoothed ``values``, starting from the first value
+
+    ``y[n] = (1 - alpha) * y[n - 1] + alpha * x[n]`` written in closed form,
+    ``y[k] = d**(k + 1) * (y[-1] + alpha * sum(x[j] * d**-(j + 1)))``, so each
+    block of days is one cumulative sum instead of a Python loop.
+    """
+    values = np.asarray(values, dtype=float)
+    out = np.empty_like(values)
+    if not len(values):
+        return out
+    decay = 1.0 - alpha
+    block = max(1, int(_MAX_EXPONENT / -np.log(decay))) if 0 < decay < 1 else len(values)
+    steps = decay ** np.arange(1, min(block, len(values)) + 1)
+    state = values[0]
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = steps[:len(chunk)]
+        out[start:start + len(chunk)] = powers * (state + alpha * np.cumsum(chunk / powers))
+        state = out[start + len(chunk) - 1]
+    return out
+
+
+def _weight_trend(history):
+    if not history:
+        return None
+    dates = np.array([entry["date"] for entry in history], dtype="datetime64[D]")
+    weights = np.array([entry["weight"] for entry in history], dtype=float)
+    # Several weigh-ins on one day count as their mean.
+    days, groups = np.unique(dates, return_inverse=True)
+    daily = np.bincount(groups, weights=weights) / np.bincount(groups)
+
+    # The trend advances one step per calendar day; days without a weigh-in
+    # are filled in linearly so gaps do not drag the trend toward old values.
+    offsets = (days - days[0]).astype(np.int64)
+    grid = np.arange(offsets[-1] + 1)
+    trend = ewma(np.interp(grid, offsets, daily), TREND_SMOOTHING)
+
+    window = trend[-TREND_WINDOW_DAYS:]
+    rate = float(np.polyfit(np.arange(len(window)), window, 1)[0] * 7) if len(window) > 1 else None
+    points = [
+        {"date": str(day), "weight": round(float(weight), 2), "trend": round(float(value), 2)}
+        for day, weight, value in zip(days, daily, trend[offsets])
+    ]
+    return {
+        "latest": points[-1],
+        "rate_per_week": None if rate is None else round(rate, 3),
+        "points": points,
+    }
+
+
+def compute_rollups(store):
+    """Compute every rollup from ``store`` without using the cache"""
+    profile = store.profile()
+    targets = np.array([profile[f"daily_{macro}"] for macro in MACROS], dtype=float)
+    days, totals = _day_arrays(store)
+
+    result = {
+        "targets": {macro: profile[f"daily_{macro}"] for macro in MACROS},
+        "weekly": [],
+        "monthly": [],
+        "weight": _weight_trend(store.weight_history()),
+    }
+    if len(days):
+        # datetime64 days count from Thursday 1970-01-01, so +3 makes weeks
+        # start on Monday.
+        weeks, *stats = _group((days.astype(np.int64) + 3) // 7, totals, targets)
+        week_starts = (weeks * 7 - 3).astype("datetime64[D]").astype(str)
+        result["weekly"] = _rows(week_starts, *stats)
+        months, *stats = _group(days.astype("datetime64[M]"), totals, targets)
+        result["monthly"] = _rows(months.astype(str), *stats)
+    return result
+
+
+def load_rollups(store, path=ROLLUPS_FILE):
+    """Rollups for ``store``, from memory or the cache file when still current"""
+    global _memo
+    stamp = [ROLLUPS_FORMAT, type(store).__name__, store.version()]
+    if _memo is not None and _memo[0] == stamp:
+        return _memo[1]
+    path = Path(path)
+    try:
+        with open(path, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = None
+    if cached is not None and cached.get("stamp") == stamp:
+        result = cached["rollups"]
+    else:
+        result = compute_rollups(store)
+        write_atomic(path, json.dumps({"stamp": stamp, "rollups": result}, separators=(",", ":")))
+    _memo = (stamp, result)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Weekly and monthly rollups and the weight trend")
+    parser.add_argument("--json", action="store_true", help="print every rollup as JSON")
+    parser.add_argument("--storage", choices=BACKENDS,
+                        help="storage backend (default: $MACRO_TRACKER_STORAGE or journal)")
+    args = parser.parse_args()
+
+    store = open_storage(args.storage)
+    try:
+        result = load_rollups(store)
+    finally:
+        store.close()
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for period in ("weekly", "monthly"):
+        print(f"{period.capitalize()}:")
+        for row in result[period][-8:]:
+            print(f"  {row['start']:<10}  {row['days']} days  {row['calories']:>7.1f} cal  "
+                  f"P {row['protein']:.1f}g  C {row['carbs']:.1f}g  F {row['fat']:.1f}g  "
+                  f"on target {row['adherence']:.0f}%  protein hit {row['protein_hit']:.0f}%")
+    weight = result["weight"]
+    if weight:
+        latest = weight["latest"]
+        rate = weight["rate_per_week"]
+        print(f"Weight: {latest['weight']} kg on {latest['date']}, trend {latest['trend']} kg"
+              + (f", {rate:+.2f} kg/week" if rate is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Load test GET/POST /workouts and report throughput and latency percentiles.
+
+Run from workout-api/:
+
+    python -m benchmarks.loadtest --rows 10k 1m --target inprocess uvicorn \\
+        --concurrency 50 --duration 10 --write-ratio 0.2 --output results.json
+
+For each dataset size, a synthetic ``workouts.db`` is generated once and
+cached under ``--data-dir``. Every run works on a fresh copy of it. Each
+target then gets a mixed workload. Reads are pages of GET /workouts, with a
+random exercise filter half of the time and a random keyset cursor. Writes
+are POST /workouts. Rows and requests are spread over ``--users`` athletes,
+sent as ``X-User-Id``. The targets are:
+
+- ``inprocess``: the app driven through httpx's ASGI transport, with no network.
+- ``uvicorn``: a local ``uvicorn main:app`` subprocess over HTTP.
+
+The report is JSON. It has one entry per (rows, target) with request counts,
+errors, requests per second and p50/p95/p99 latency in milliseconds, overall
+and per operation. Keep reports from each release to compare them.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+
+EXERCISES = [
+    "Bench Press", "Incline Bench Press", "Squat", "Front Squat", "Deadlift",
+    "Romanian Deadlift", "Overhead Press", "Barbell Row", "Pull-up", "Dip",
+]
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def _random_workout(rng: random.Random) -> dict:
+    return {
+        "exercise": rng.choice(EXERCISES),
+        "sets": rng.randint(1, 5),
+        "reps": rng.randint(1, 12),
+        "weight": float(rng.randrange(45, 405, 5)),
+        "date": (date(2015, 1, 1) + timedelta(days=rng.randint(0, 3650))).isoformat(),
+    }
+
+
+def _user(index: int) -> str:
+    return f"user-{index}"
+
+
+def generate_dataset(path: Path, rows: int, users: int, seed: int = 42) -> None:
+    """Create a workouts.db with ``rows`` synthetic workouts and derived tables."""
+    tmp = path.with_suffix(".partial")
+    tmp.unlink(missing_ok=True)
+    # Schema, indexes and migrations come from the app itself; an empty
+    # database is initialised by a throwaway process pointed at it.
+    env = dict(os.environ, WORKOUT_DATABASE_URL=f"sqlite+aiosqlite:///{tmp}")
+    subprocess.run(
+        [sys.executable, "-c", "import asyncio, main; asyncio.run(main.on_startup())"],
+        cwd=ROOT, env=env, check=True,
+    )
+
+    rng = random.Random(seed)
+    connection = sqlite3.connect(tmp)
+    connection.execute("PRAGMA synchronous=OFF")
+    chunk = 50_000
+    for offset in range(0, rows, chunk):
+        batch = [_random_workout(rng) for _ in range(min(chunk, rows - offset))]
+        connection.executemany(
+            "INSERT INTO workout (user_id, exercise, sets, reps, weight, date) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (_user(rng.randrange(users)), w["exercise"], w["sets"], w["reps"], w["weight"], w["date"])
+                for w in batch
+            ],
+        )
+        connection.commit()
+    connection.close()
+
+    # Bulk-loaded rows bypass the incremental summaries, records and search
+    # index, so rebuild them once.
+    rebuild = (
+        "from sqlalchemy import create_engine\n"
+        "from services.migrations import rebuild_derived\n"
+        f"engine = create_engine('sqlite:///{tmp}')\n"
+        "with engine.begin() as connection:\n"
+        "    rebuild_derived(connection)\n"
+    )
+    subprocess.run([sys.executable, "-c", rebuild], cwd=ROOT, check=True)
+    tmp.replace(path)
+
+
+def dataset(data_dir: Path, rows: int, users: int) -> Path:
+    path = data_dir / f"workouts-{rows}-{users}u.db"
+    if not path.exists():
+        data_dir.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        generate_dataset(path, rows, users)
+        print(f"generated {rows} rows in {time.perf_counter() - started:.1f}s -> {path}", file=sys.stderr)
+    return path
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _summarise(latencies: list[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(_percentile(ordered, 99) * 1000, 3),
+    }
+
+
+async def drive(client: httpx.AsyncClient, rows: int, args) -> dict:
+    latencies: dict[str, list[float]] = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            headers = {"X-User-Id": _user(rng.randrange(args.users))}
+            if rng.random() < args.write_ratio:
+                op = "write"
+                request = client.post("/workouts", json=_random_workout(rng), headers=headers)
+            else:
+                op = "read"
+                params = {"limit": args.page_size, "cursor": rng.randint(0, max(rows, 1))}
+                if rng.random() < 0.5:
+                    params["exercise"] = rng.choice(EXERCISES)
+                request = client.get("/workouts", params=params, headers=headers)
+            started = time.perf_counter()
+            try:
+                response = await request
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies[op].append(time.perf_counter() - started)
+            if not ok:
+                errors[op] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(args.seed + i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "overall": _summarise(latencies["read"] + latencies["write"], errors["read"] + errors["write"], elapsed),
+        "read": _summarise(latencies["read"], errors["read"], elapsed),
+        "write": _summarise(latencies["write"], errors["write"], elapsed),
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+async def run_inprocess(db_path: Path, rows: int, args) -> dict:
+    # Settings are read at import time, so the app is imported in a fresh
+    # interpreter per dataset to pick up the database URL.
+    code = (
+        "import asyncio, json, sys\n"
+        "from benchmarks.loadtest import _inprocess_main\n"
+        "print(json.dumps(asyncio.run(_inprocess_main(json.loads(sys.argv[1])))))\n"
+    )
+    payload = json.dumps({"rows": rows, "args": vars(args)}, default=str)
+    env = dict(os.environ, WORKOUT_DATABASE_URL=f"sqlite+aiosqlite:///{db_path}")
+    result = subprocess.run(
+        [sys.executable, "-c", code, payload], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+async def _inprocess_main(payload: dict) -> dict:
+    import main
+
+    args = argparse.Namespace(**payload["args"])
+    await main.on_startup()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await drive(client, payload["rows"], args)
+    finally:
+        await main.on_shutdown()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(db_path: Path, rows: int, args) -> dict:
+    port = _free_port()
+    env = dict(os.environ, WORKOUT_DATABASE_URL=f"sqlite+aiosqlite:///{db_path}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            for _ in range(300):
+                try:
+                    await client.get("/")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start")
+            return await drive(client, rows, args)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+TARGETS = {"inprocess": run_inprocess, "uvicorn": run_uvicorn}
+
+
+async def run(args) -> dict:
+    results = []
+    for rows in args.rows:
+        source = dataset(args.data_dir, rows, args.users)
+        for target in args.target:
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = Path(tmp) / "workouts.db"
+                shutil.copyfile(source, db_path)
+                report = await TARGETS[target](db_path, rows, args)
+            results.append({"rows": rows, "target": target, **report})
+            print(f"{target} @ {rows} rows: {report['overall']}", file=sys.stderr)
+    return {
+        "benchmark": "loadtest",
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "write_ratio": args.write_ratio,
+        "page_size": args.page_size,
+        "users": args.users,
+        "write_mode": os.environ.get("WORKOUT_WRITE_MODE", "direct"),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=parse_size, nargs="+", default=[10_000], help="dataset sizes, e.g. 10k 1m 10m")
+    parser.add_argument("--target", choices=sorted(TARGETS), nargs="+", default=["inprocess"])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--users", type=int, default=1, help="athletes to spread rows and requests over")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--data-dir", type=Path, default=Path(tempfile.gettempdir()) / "workout-api-bench")
+    parser.add_argument("--output", type=Path, help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Compare the two ways of serializing a GET /workouts page.
+
+Run from workout-api/:
+
+    python -m benchmarks.serialization --rows 20000 --repeat 50
+
+``model`` is what ``get_workouts`` used to do. It loads ``Workout`` entities,
+validates them into a ``WorkoutPage`` and encodes the result the way FastAPI
+does for a ``response_model``: ``jsonable_encoder`` followed by ``json.dumps``.
+``tuples`` is the current path. It selects plain columns and encodes them
+directly with orjson. Both read the same rows from the same database. The
+result is printed as JSON, including rows per second for each page size and
+the speedup.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+USER = "bench"
+
+
+async def _populate(rows: int) -> None:
+    from models.workout import WorkoutCreate
+    from services.db import get_session, init_db
+    from services.workouts import save_workouts
+
+    await init_db()
+    exercises = ["Bench Press", "Squat", "Deadlift", "Overhead Press", "Barbell Row"]
+    start = date(2020, 1, 1)
+    async for session in get_session(USER):
+        for offset in range(0, rows, 5000):
+            payloads = [
+                WorkoutCreate(
+                    exercise=random.choice(exercises),
+                    sets=random.randint(1, 5),
+                    reps=random.randint(1, 12),
+                    weight=random.randrange(45, 405, 5),
+                    date=start + timedelta(days=random.randint(0, 2000)),
+                )
+                for _ in range(min(5000, rows - offset))
+            ]
+            await save_workouts(session, USER, payloads)
+
+
+async def _model_path(session, limit: int) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+    from sqlmodel import select
+
+    from models.workout import Workout, WorkoutPage
+
+    statement = select(Workout).where(Workout.user_id == USER).order_by(Workout.id).limit(limit)
+    rows = (await session.exec(statement)).all()
+    page = WorkoutPage.model_validate(WorkoutPage(items=rows, next_cursor=None))
+    return json.dumps(jsonable_encoder(page)).encode()
+
+
+async def _tuple_path(session, limit: int) -> bytes:
+    from sqlmodel import select
+
+    from models.workout import Workout
+    from routes.workouts import WORKOUT_COLUMNS, WORKOUT_KEYS
+    from services.cache import encode_json
+
+    statement = select(*WORKOUT_COLUMNS).where(Workout.user_id == USER).order_by(Workout.id).limit(limit)
+    rows = (await session.exec(statement)).all()
+    return encode_json({"items": [dict(zip(WORKOUT_KEYS, row)) for row in rows], "next_cursor": None})
+
+
+async def _measure(path, limit: int, repeat: int) -> float:
+    from services.db import get_session
+
+    async for session in get_session(USER):
+        await path(session, limit)  # warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            await path(session, limit)
+        elapsed = time.perf_counter() - started
+    return limit * repeat / elapsed
+
+
+async def _run(args) -> dict:
+    await _populate(args.rows)
+    results = []
+    for limit in args.page_sizes:
+        limit = min(limit, args.rows)
+        model = await _measure(_model_path, limit, args.repeat)
+        tuples = await _measure(_tuple_path, limit, args.repeat)
+        results.append(
+            {
+                "page_size": limit,
+                "model_rows_per_sec": round(model),
+                "tuples_rows_per_sec": round(tuples),
+                "speedup": round(tuples / model, 2),
+            }
+        )
+    return {"benchmark": "serialization", "rows": args.rows, "repeat": args.repeat, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=20_000, help="rows to generate")
+    parser.add_argument("--repeat", type=int, default=50, help="serializations per page size")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Settings are read at import time, so point them at a scratch database first.
+        os.environ["WORKOUT_DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        report = asyncio.run(_run(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
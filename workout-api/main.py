@@ -1,12 +1,28 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from routes.workouts import router as workouts_router
-from services.db import init_db
+from routes.stats import router as stats_router
+from routes.exercises import router as exercises_router
+from routes.records import router as records_router
+from services.config import settings
+from services.db import dispose_engines, engines, init_db
+from services.events import workout_events
+from services.metrics import MetricsMiddleware, instrument_engine, render_metrics
+from services.write_queue import write_queue
 
 app = FastAPI()
 
 @app.on_event("startup")
-def on_startup():
-    init_db()
+async def on_startup():
+    await init_db()
+    if settings.write_mode != "direct":
+        write_queue.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    workout_events.close()
+    await write_queue.stop()
+    await dispose_engines()
 
 #Simple Health Check
 @app.get("/")
@@ -14,4 +30,17 @@ def root():
     return {"message": "Workout API Running"}
 
 # Reg workout route
-app.include_router(workouts_router)
\ No newline at end of file
+app.include_router(workouts_router)
+app.include_router(stats_router)
+app.include_router(exercises_router)
+app.include_router(records_router)
+
+# Opt-in instrumentation (WORKOUT_METRICS=1)
+if settings.metrics_enabled:
+    for engine in engines:
+        instrument_engine(engine.sync_engine, settings.slow_query_ms)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
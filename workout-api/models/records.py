@@ -0,0 +1,48 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Date
+import datetime
+from typing import Optional
+
+
+class PersonalRecord(SQLModel, table=True):
+    __tablename__ = "personal_records"
+
+    user_id: str = Field(primary_key=True)
+    exercise: str = Field(primary_key=True)
+    best_weight: float
+    best_weight_reps: int
+    best_weight_workout_id: int
+    best_weight_date: Optional[datetime.date] = Field(default=None, sa_type=Date)
+    best_set_volume: float
+    best_set_volume_workout_id: int
+    best_set_volume_date: Optional[datetime.date] = Field(default=None, sa_type=Date)
+
+
+class RepRecord(SQLModel, table=True):
+    __tablename__ = "rep_records"
+
+    user_id: str = Field(primary_key=True)
+    exercise: str = Field(primary_key=True)
+    weight: float = Field(primary_key=True)
+    reps: int
+    workout_id: int
+    date: Optional[datetime.date] = Field(default=None, sa_type=Date)
+
+
+class RepRecordRead(SQLModel):
+    weight: float
+    reps: int
+    workout_id: int
+    date: Optional[datetime.date] = None
+
+
+class ExerciseRecords(SQLModel):
+    exercise: str
+    best_weight: float
+    best_weight_reps: int
+    best_weight_workout_id: int
+    best_weight_date: Optional[datetime.date] = None
+    best_set_volume: float
+    best_set_volume_workout_id: int
+    best_set_volume_date: Optional[datetime.date] = None
+    reps_at_weight: list[RepRecordRead]
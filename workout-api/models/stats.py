@@ -0,0 +1,50 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Date, Index
+import datetime
+from typing import Optional
+
+
+class ExerciseTotals(SQLModel, table=True):
+    __tablename__ = "exercise_totals"
+
+    user_id: str = Field(primary_key=True)
+    exercise: str = Field(primary_key=True)
+    workouts: int = 0
+    total_sets: int = 0
+    total_reps: int = 0
+    total_volume: float = 0
+    best_e1rm: float = 0
+    first_date: Optional[datetime.date] = Field(default=None, sa_type=Date)
+    last_date: Optional[datetime.date] = Field(default=None, sa_type=Date)
+
+
+class WeeklyVolume(SQLModel, table=True):
+    __tablename__ = "weekly_volume"
+    __table_args__ = (Index("ix_weekly_volume_user_week_start", "user_id", "week_start"),)
+
+    user_id: str = Field(primary_key=True)
+    exercise: str = Field(primary_key=True)
+    week_start: datetime.date = Field(primary_key=True, sa_type=Date)
+    total_sets: int = 0
+    total_reps: int = 0
+    total_volume: float = 0
+    best_e1rm: float = 0
+
+
+class WeeklyVolumeRead(SQLModel):
+    week_start: datetime.date
+    exercise: str | None = None
+    total_sets: int
+    total_reps: int
+    total_volume: float
+    best_e1rm: float
+
+
+class ExerciseE1rm(SQLModel):
+    exercise: str
+    best_e1rm: float
+
+
+class ExerciseMatch(SQLModel):
+    exercise: str
+    workouts: int
@@ -1,16 +1,28 @@
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, Date
-from datetime import date
-from typing import Optional
+from sqlalchemy import Column, Date, Index
+import datetime
+from typing import Any, Optional
 
 
 class Workout(SQLModel, table=True):
+    # Every read is scoped to one athlete, so each index leads with user_id.
+    # Listing pages by id within an exercise or a date range; the middle
+    # column filters and the trailing id keeps the keyset walk on the index.
+    # (user_id, exercise, date) serves per-exercise history over a date range.
+    __table_args__ = (
+        Index("ix_workout_user_id", "user_id", "id"),
+        Index("ix_workout_user_exercise_id", "user_id", "exercise", "id"),
+        Index("ix_workout_user_date_id", "user_id", "date", "id"),
+        Index("ix_workout_user_exercise_date", "user_id", "exercise", "date"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
+    user_id: str
     exercise: str 
     sets: int
     reps: int
     weight: float
-    date: Optional[str] = Field(default=None)
+    date: Optional[datetime.date] = Field(default=None, sa_type=Date)
 
 
 class WorkoutCreate(SQLModel):
@@ -18,4 +30,28 @@ class WorkoutCreate(SQLModel):
     sets: int
     reps: int
     weight: float
-    date: Optional[str] = None
\ No newline at end of file
+    date: Optional[datetime.date] = None
+
+
+class WorkoutRead(WorkoutCreate):
+    id: int
+
+
+class WorkoutCreated(WorkoutCreate):
+    id: int
+    new_records: list[str] = []
+
+
+class WorkoutPage(SQLModel):
+    items: list[WorkoutRead]
+    next_cursor: int | None = None
+
+
+class WorkoutBatchError(SQLModel):
+    index: int
+    errors: list[dict[str, Any]]
+
+
+class WorkoutBatchResult(SQLModel):
+    ids: list[int]
+    errors: list[WorkoutBatchError]
\ No newline at end of file
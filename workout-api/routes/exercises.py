@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
+from services.cache import cached_response
+from services.db import get_session
+from services.search import search_exercises
+from services.users import current_user
+from models.stats import ExerciseMatch
+
+router = APIRouter(prefix="/exercises")
+
+
+@router.get("/search", response_model=list[ExerciseMatch])
+async def search(
+    request: Request,
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=50),
+    user_id: str = Depends(current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    async def build():
+        rows = await search_exercises(await session.connection(), user_id, q, limit)
+        return [{"exercise": exercise, "workouts": workouts} for exercise, workouts in rows]
+
+    return await cached_response(request, user_id, build)
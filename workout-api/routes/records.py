@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from services.cache import cached_response
+from services.db import get_session
+from services.users import current_user
+from models.records import ExerciseRecords, PersonalRecord, RepRecord, RepRecordRead
+
+router = APIRouter(prefix="/records")
+
+
+@router.get("", response_model=list[PersonalRecord])
+async def get_records(
+    request: Request,
+    user_id: str = Depends(current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    async def build():
+        statement = (
+            select(PersonalRecord).where(PersonalRecord.user_id == user_id).order_by(PersonalRecord.exercise)
+        )
+        return (await session.exec(statement)).all()
+
+    return await cached_response(request, user_id, build)
+
+
+@router.get("/{exercise}", response_model=ExerciseRecords)
+async def get_exercise_records(
+    request: Request,
+    exercise: str,
+    user_id: str = Depends(current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    async def build():
+        record = await session.get(PersonalRecord, (user_id, exercise))
+        if record is None:
+            raise HTTPException(status_code=404, detail="No records for this exercise")
+        statement = (
+            select(RepRecord)
+            .where(RepRecord.user_id == user_id, RepRecord.exercise == exercise)
+            .order_by(RepRecord.weight)
+        )
+        reps = (await session.exec(statement)).all()
+        return ExerciseRecords(
+            **record.model_dump(),
+            reps_at_weight=[RepRecordRead.model_validate(rep, from_attributes=True) for rep in reps],
+        )
+
+    return await cached_response(request, user_id, build)
@@ -0,0 +1,102 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from services.cache import cached_response
+from services.db import get_session
+from services.users import current_user
+from models.stats import ExerciseE1rm, ExerciseTotals, WeeklyVolume, WeeklyVolumeRead
+
+router = APIRouter(prefix="/stats")
+
+
+@router.get("/exercises", response_model=list[ExerciseTotals])
+async def get_exercise_totals(
+    request: Request,
+    user_id: str = Depends(current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    async def build():
+        statement = (
+            select(ExerciseTotals).where(ExerciseTotals.user_id == user_id).order_by(ExerciseTotals.exercise)
+        )
+        return (await session.exec(statement)).all()
+
+    return await cached_response(request, user_id, build)
+
+
+@router.get("/exercises/{exercise}", response_model=ExerciseTotals)
+async def get_exercise_total(
+    request: Request,
+    exercise: str,
+    user_id: str = Depends(current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    async def build():
+        totals = await session.get(ExerciseTotals, (user_id, exercise))
+        if totals is None:
+            raise HTTPException(status_code=404, detail="Exercise not found")
+        return totals
+
+    return await cached_response(request, user_id, build)
+
+
+@router.get("/weekly", response_model=list[WeeklyVolumeRead])
+async def get_weekly_volume(
+    request: Request,
+    exercise: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    user_id: str = Depends(current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    if exercise is not None:
+        statement = select(
+            WeeklyVolume.week_start,
+            WeeklyVolume.exercise,
+            WeeklyVolume.total_sets,
+            WeeklyVolume.total_reps,
+            WeeklyVolume.total_volume,
+            WeeklyVolume.best_e1rm,
+        ).where(WeeklyVolume.exercise == exercise)
+    else:
+        # Across all exercises: still summary rows only, one per exercise-week.
+        statement = select(
+            WeeklyVolume.week_start,
+            func.sum(WeeklyVolume.total_sets).label("total_sets"),
+            func.sum(WeeklyVolume.total_reps).label("total_reps"),
+            func.sum(WeeklyVolume.total_volume).label("total_volume"),
+            func.max(WeeklyVolume.best_e1rm).label("best_e1rm"),
+        ).group_by(WeeklyVolume.week_start)
+    statement = statement.where(WeeklyVolume.user_id == user_id)
+    if start is not None:
+        statement = statement.where(WeeklyVolume.week_start >= start)
+    if end is not None:
+        statement = statement.where(WeeklyVolume.week_start <= end)
+    statement = statement.order_by(WeeklyVolume.week_start)
+
+    async def build():
+        rows = (await session.exec(statement)).all()
+        return [WeeklyVolumeRead(**row._mapping) for row in rows]
+
+    return await cached_response(request, user_id, build)
+
+
+@router.get("/e1rm", response_model=list[ExerciseE1rm])
+async def get_estimated_1rm(
+    request: Request,
+    user_id: str = Depends(current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    async def build():
+        statement = (
+            select(ExerciseTotals.exercise, ExerciseTotals.best_e1rm)
+            .where(ExerciseTotals.user_id == user_id)
+            .order_by(ExerciseTotals.exercise)
+        )
+        rows = (await session.exec(statement)).all()
+        return [ExerciseE1rm(**row._mapping) for row in rows]
+
+    return await cached_response(request, user_id, build)
@@ -1,26 +1,210 @@
-from fastapi import APIRouter
-from sqlmodel import Session, select
-from services.db import engine
-from models.workout import Workout, WorkoutCreate
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import date
+from typing import Any, Literal
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from services.cache import cached_response
+from services.config import settings
+from services.db import engine_for, get_session
+from services.events import Lagged, encode_event, workout_events
+from services.export import stream_csv, stream_ndjson
+from services.users import current_user
+from services.workouts import save_workouts
+from services.write_queue import QueueClosed, QueueFull, write_queue
+from models.workout import (
+    Workout,
+    WorkoutBatchError,
+    WorkoutBatchResult,
+    WorkoutCreate,
+    WorkoutCreated,
+    WorkoutPage,
+)
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 500
+MAX_BATCH_SIZE = 10_000
+
+
+@router.post("/workouts", response_model=WorkoutCreated)
+async def create_workout(
+    payload: WorkoutCreate,
+    user_id: str = Depends(current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    if settings.write_mode != "direct":
+        try:
+            saved = await write_queue.submit(user_id, payload, wait=settings.write_mode == "group")
+        except (QueueFull, QueueClosed):
+            raise HTTPException(status_code=503, detail="Write queue is full", headers={"Retry-After": "1"})
+        if saved is None:
+            return JSONResponse(status_code=202, content={"status": "queued"})
+    else:
+        [saved] = await save_workouts(session, user_id, [payload])
+
+    return WorkoutCreated(id=saved.id, new_records=saved.new_records, **payload.model_dump())
+
+
+@router.post("/workouts/batch", response_model=WorkoutBatchResult)
+async def create_workouts_batch(
+    payload: list[Any] = Body(..., max_length=MAX_BATCH_SIZE),
+    user_id: str = Depends(current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    # Rows are validated one by one so a bad entry is reported by its index
+    # instead of rejecting the whole import; the valid rows are still saved.
+    valid: list[WorkoutCreate] = []
+    errors: list[WorkoutBatchError] = []
+    for index, item in enumerate(payload):
+        try:
+            valid.append(WorkoutCreate.model_validate(item))
+        except ValidationError as exc:
+            errors.append(
+                WorkoutBatchError(
+                    index=index,
+                    errors=exc.errors(include_url=False, include_context=False, include_input=False),
+                )
+            )
+
+    saved = await save_workouts(session, user_id, valid)
+
+    return WorkoutBatchResult(ids=[workout.id for workout in saved], errors=errors)
+
+
+def _filter_workouts(statement, user_id: str, exercise: str | None, start: date | None, end: date | None):
+    statement = statement.where(Workout.user_id == user_id)
+    if exercise is not None:
+        statement = statement.where(Workout.exercise == exercise)
+    if start is not None:
+        statement = statement.where(Workout.date >= start)
+    if end is not None:
+        statement = statement.where(Workout.date <= end)
+    return statement
+
+
+# Plain columns in response order. Reads select these instead of Workout
+# entities, so rows come back as tuples with no per-row model construction.
+WORKOUT_COLUMNS = (Workout.id, Workout.exercise, Workout.sets, Workout.reps, Workout.weight, Workout.date)
+WORKOUT_KEYS = tuple(column.key for column in WORKOUT_COLUMNS)
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.get("/workouts/export")
+async def export_workouts(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    exercise: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    user_id: str = Depends(current_user),
+):
+    statement = _filter_workouts(select(*WORKOUT_COLUMNS), user_id, exercise, start, end).order_by(Workout.id)
+    engine = engine_for(user_id)
+    body = stream_csv(engine, statement) if format == "csv" else stream_ndjson(engine, statement)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="workouts.{format}"'},
+    )
+
+
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+async def _replay(user_id: str, after: int) -> AsyncIterator[tuple[int, bytes]]:
+    """Read an athlete's workouts after ``after`` back from the database as events.
+
+    Each page uses a short-lived connection so a slow client never holds a
+    read transaction open.
+    """
+    while True:
+        statement = (
+            select(*WORKOUT_COLUMNS)
+            .where(Workout.user_id == user_id, Workout.id > after)
+            .order_by(Workout.id)
+            .limit(MAX_PAGE_SIZE)
+        )
+        async with engine_for(user_id).connect() as connection:
+            rows = (await connection.execute(statement)).all()
+        for row in rows:
+            after = row[0]
+            yield after, encode_event(after, dict(zip(WORKOUT_KEYS, row)))
+        if len(rows) < MAX_PAGE_SIZE:
+            return
+
+
+async def _event_stream(user_id: str, after: int | None) -> AsyncIterator[bytes]:
+    # Subscribe here rather than in the endpoint, so the finally below
+    # always pairs with it: a response body that is never iterated never
+    # subscribes. It still happens before the replay, so nothing committed
+    # in between is missed. Live events that a replay (or the client,
+    # through Last-Event-ID) already has are skipped by id.
+    subscription = workout_events.subscribe(user_id)
+    replayed = after or 0
+    try:
+        if after is not None:
+            async for replayed, message in _replay(user_id, after):
+                yield message
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.get(), STREAM_KEEPALIVE_SECONDS)
+            except TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if item is None:
+                return
+            if isinstance(item, Lagged):
+                async for workout_id, message in _replay(user_id, max(item.after, replayed)):
+                    replayed = workout_id
+                    yield message
+                continue
+            workout_id, message = item
+            if workout_id > replayed:
+                yield message
+    finally:
+        workout_events.unsubscribe(subscription)
 
-@router.post("/workouts")
-def create_workout(payload: WorkoutCreate):
-    workout = Workout(**payload.model_dump())
 
-    with Session(engine) as session:
-        session.add(workout)
-        session.commit()
-        session.refresh(workout)
+@router.get("/workouts/stream")
+async def stream_workouts(
+    user_id: str = Depends(current_user),
+    last_event_id: int | None = Header(default=None),
+):
+    # Server-sent events, one per committed workout. EventSource sends
+    # Last-Event-ID when it reconnects, and whatever was missed is replayed.
+    return StreamingResponse(
+        _event_stream(user_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    return workout
 
+@router.get("/workouts", response_model=WorkoutPage)
+async def get_workouts(
+    request: Request,
+    exercise: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    cursor: int | None = Query(default=None, description="Return workouts with an id greater than this"),
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    user_id: str = Depends(current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    # Keyset pagination: seek past the last id the client saw instead of
+    # using OFFSET, so every page costs the same regardless of depth.
+    statement = _filter_workouts(select(*WORKOUT_COLUMNS), user_id, exercise, start, end)
+    if cursor is not None:
+        statement = statement.where(Workout.id > cursor)
+    statement = statement.order_by(Workout.id).limit(limit + 1)
 
+    async def build():
+        rows = (await session.exec(statement)).all()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return {"items": [dict(zip(WORKOUT_KEYS, row)) for row in rows[:limit]], "next_cursor": next_cursor}
 
-@router.get("/workouts")
-def get_workouts():
-    with Session(engine) as session:
-        result = session.exec(select(Workout)).all()
-        return result
+    return await cached_response(request, user_id, build)
@@ -0,0 +1,126 @@
+"""Conditional GET and an in-process cache for read endpoints.
+
+``table_version`` keeps one version per athlete and bumps it after every
+committed write of theirs. Cached responses carry the version they were
+built at, so a bump makes that athlete's entries stale while everyone
+else's stay warm. Stale entries are replaced on the next read or fall out
+of the LRU. ETags combine a per-boot id, the athlete's version and the
+request's path and query. A client that sends back the ETag (or
+``Last-Modified``) gets ``304 Not Modified`` without a database query until
+something is written.
+
+The version lives in this process. With several workers, each keeps its own
+cache and only sees its own writes, so run a single worker when relying on it.
+"""
+
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any
+
+import orjson
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from services.config import settings
+
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class TableVersion:
+    def __init__(self):
+        self._started_at = time.time()
+        self._versions: dict[str, tuple[int, float]] = {}
+
+    def get(self, user_id: str) -> tuple[int, float]:
+        """Return the athlete's version and when it last changed."""
+        return self._versions.get(user_id, (0, self._started_at))
+
+    def bump(self, user_id: str) -> None:
+        """Record a write, stamped with the time it was committed."""
+        version, _ = self.get(user_id)
+        self._versions[user_id] = (version + 1, time.time())
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], tuple[int, bytes]] = OrderedDict()
+
+    def get(self, user_id: str, key: str, version: int) -> bytes | None:
+        entry = self._entries.get((user_id, key))
+        if entry is None or entry[0] != version:
+            return None
+        self._entries.move_to_end((user_id, key))
+        return entry[1]
+
+    def put(self, user_id: str, key: str, version: int, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[(user_id, key)] = (version, body)
+        self._entries.move_to_end((user_id, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache(settings.response_cache_size)
+table_version = TableVersion()
+
+
+def _request_key(request: Request) -> str:
+    query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+    return f"{request.url.path}?{query}"
+
+
+def _not_modified(request: Request, etag: str, modified_at: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        # Last-Modified has whole seconds, so a date is only trusted once its
+        # second is over; a later write in the same second would not move it.
+        if int(modified_at) >= int(time.time()):
+            return False
+        try:
+            return int(modified_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode_json(value: Any) -> bytes:
+    """Encode plain data with orjson. Dates are written as ISO strings."""
+    return orjson.dumps(value, default=_encode_default)
+
+
+async def cached_response(request: Request, user_id: str, build: Callable[[], Awaitable[Any]]) -> Response:
+    """Answer a read from the cache or a 304 when possible, else call ``build``."""
+    version, modified_at = table_version.get(user_id)
+    key = _request_key(request)
+    digest = hashlib.blake2b(f"{user_id}\n{key}".encode(), digest_size=8).hexdigest()
+    headers = {
+        "ETag": f'"{_BOOT_ID}-{version}-{digest}"',
+        "Last-Modified": formatdate(modified_at, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, headers["ETag"], modified_at):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(user_id, key, version)
+    if body is None:
+        body = encode_json(await build())
+        # Only cache if no write landed while the response was being built.
+        if table_version.get(user_id)[0] == version:
+            response_cache.put(user_id, key, version, body)
+    return Response(content=body, media_type="application/json", headers=headers)
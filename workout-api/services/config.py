@@ -0,0 +1,77 @@
+import os
+from dataclasses import dataclass
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    return value.strip().lower() in ("1", "true", "yes", "on") if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Deployment settings, read once from ``WORKOUT_*`` environment variables."""
+
+    database_url: str = "sqlite+aiosqlite:///workouts.db"
+    shards: int = 1
+    default_user: str = "default"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    busy_timeout_ms: int = 5000
+    db_echo: bool = False
+    metrics_enabled: bool = False
+    slow_query_ms: float = 100.0
+    db_synchronous: str | None = None
+    write_mode: str = "direct"
+    write_queue_size: int = 10_000
+    write_batch_size: int = 500
+    write_flush_ms: float = 5.0
+    write_enqueue_timeout: float = 1.0
+    response_cache_size: int = 256
+    stream_buffer_size: int = 256
+
+    def __post_init__(self):
+        if self.shards < 1:
+            raise ValueError("WORKOUT_DB_SHARDS must be at least 1")
+        if self.shards > 1 and "{shard}" not in self.database_url:
+            raise ValueError("WORKOUT_DATABASE_URL needs a {shard} placeholder when WORKOUT_DB_SHARDS > 1")
+        if self.write_mode not in ("direct", "group", "deferred"):
+            raise ValueError(f"WORKOUT_WRITE_MODE must be direct, group or deferred, not {self.write_mode!r}")
+        if self.db_synchronous not in (None, "OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"WORKOUT_DB_SYNCHRONOUS must be OFF, NORMAL, FULL or EXTRA, not {self.db_synchronous!r}")
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=os.environ.get("WORKOUT_DATABASE_URL", cls.database_url),
+            shards=_env_int("WORKOUT_DB_SHARDS", cls.shards),
+            default_user=os.environ.get("WORKOUT_DEFAULT_USER", cls.default_user),
+            pool_size=_env_int("WORKOUT_DB_POOL_SIZE", cls.pool_size),
+            max_overflow=_env_int("WORKOUT_DB_MAX_OVERFLOW", cls.max_overflow),
+            pool_timeout=_env_float("WORKOUT_DB_POOL_TIMEOUT", cls.pool_timeout),
+            busy_timeout_ms=_env_int("WORKOUT_DB_BUSY_TIMEOUT_MS", cls.busy_timeout_ms),
+            db_echo=_env_bool("WORKOUT_DB_ECHO", cls.db_echo),
+            metrics_enabled=_env_bool("WORKOUT_METRICS", cls.metrics_enabled),
+            slow_query_ms=_env_float("WORKOUT_SLOW_QUERY_MS", cls.slow_query_ms),
+            db_synchronous=os.environ.get("WORKOUT_DB_SYNCHRONOUS", "").upper() or None,
+            write_mode=os.environ.get("WORKOUT_WRITE_MODE", cls.write_mode).lower(),
+            write_queue_size=_env_int("WORKOUT_WRITE_QUEUE_SIZE", cls.write_queue_size),
+            write_batch_size=_env_int("WORKOUT_WRITE_BATCH_SIZE", cls.write_batch_size),
+            write_flush_ms=_env_float("WORKOUT_WRITE_FLUSH_MS", cls.write_flush_ms),
+            write_enqueue_timeout=_env_float("WORKOUT_WRITE_ENQUEUE_TIMEOUT", cls.write_enqueue_timeout),
+            response_cache_size=_env_int("WORKOUT_RESPONSE_CACHE_SIZE", cls.response_cache_size),
+            stream_buffer_size=_env_int("WORKOUT_STREAM_BUFFER_SIZE", cls.stream_buffer_size),
+        )
+
+
+settings = Settings.from_env()
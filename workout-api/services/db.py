@@ -1,6 +1,75 @@
-from sqlmodel import SQLModel, create_engine
+import zlib
+from collections.abc import AsyncIterator
 
-engine = create_engine("sqlite:///workouts.db", echo=True)
+from fastapi import Depends
+from sqlalchemy import Connection, event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-def init_db():
-    SQLModel.metadata.create_all(engine)
\ No newline at end of file
+from services.config import settings
+from services.migrations import run_migrations
+from services.users import current_user
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    # WAL lets readers carry on while a writer commits, and the busy timeout
+    # makes concurrent writers wait for the lock instead of failing at once.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.busy_timeout_ms}")
+    if settings.db_synchronous:
+        cursor.execute(f"PRAGMA synchronous={settings.db_synchronous}")
+    cursor.close()
+
+
+def _create_engine(shard: int) -> AsyncEngine:
+    engine = create_async_engine(
+        settings.database_url.replace("{shard}", str(shard)),
+        echo=settings.db_echo,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+    )
+    event.listen(engine.sync_engine, "connect", _configure_sqlite)
+    return engine
+
+
+# One engine per SQLite file. Athletes are spread across files by a stable
+# hash of their user id, and every row an athlete owns lives in their shard.
+engines = [_create_engine(shard) for shard in range(settings.shards)]
+engine = engines[0]
+
+
+def shard_for(user_id: str) -> int:
+    return zlib.crc32(user_id.encode()) % len(engines)
+
+
+def engine_for(user_id: str) -> AsyncEngine:
+    return engines[shard_for(user_id)]
+
+
+def _create_schema(connection: Connection):
+    SQLModel.metadata.create_all(connection)
+    run_migrations(connection)
+    # create_all skips tables that already exist, and migrations may
+    # rebuild a table, so every declared index is checked individually.
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+async def init_db():
+    for shard_engine in engines:
+        async with shard_engine.begin() as connection:
+            await connection.run_sync(_create_schema)
+
+
+async def dispose_engines():
+    for shard_engine in engines:
+        await shard_engine.dispose()
+
+
+async def get_session(user_id: str = Depends(current_user)) -> AsyncIterator[AsyncSession]:
+    async with AsyncSession(engine_for(user_id), expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,117 @@
+"""In-process fan-out of newly committed workouts for ``GET /workouts/stream``.
+
+Writers publish after their commit, so subscribers only ever see rows that a
+read would also return. Each event is encoded once and the same bytes are
+handed to every subscriber of that athlete. Nothing is encoded when nobody
+is listening.
+
+Every subscriber has a bounded buffer of ``WORKOUT_STREAM_BUFFER_SIZE``
+events. When a slow consumer fills it, the buffer is emptied and replaced by
+a single ``Lagged`` marker naming the id to resume after. Nothing
+more is queued until the consumer reads the marker, and the stream then
+reads what it missed back from the database. A stalled client therefore
+costs a fixed amount of memory and never holds up the writer.
+
+Like the response cache, this only sees writes made by the same process.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+
+from services.cache import encode_json
+from services.config import settings
+
+
+@dataclass(frozen=True)
+class Lagged:
+    """Events after ``after`` were dropped and must be read from the database."""
+
+    after: int
+
+
+_CLOSED = object()
+
+
+def encode_event(workout_id: int, data: dict[str, Any]) -> bytes:
+    return b"id: %d\nevent: workout\ndata: %s\n\n" % (workout_id, encode_json(data))
+
+
+class Subscription:
+    def __init__(self, user_id: str, max_buffer: int):
+        self.user_id = user_id
+        self._queue: asyncio.Queue = asyncio.Queue(max(max_buffer, 1))
+        self._lagged = False
+        self._closed = False
+
+    def offer(self, workout_id: int, message: bytes) -> None:
+        if self._lagged or self._closed:
+            return
+        try:
+            self._queue.put_nowait((workout_id, message))
+        except asyncio.QueueFull:
+            dropped = [workout_id]
+            while not self._queue.empty():
+                dropped.append(self._queue.get_nowait()[0])
+            self._lagged = True
+            self._queue.put_nowait(Lagged(after=min(dropped) - 1))
+
+    async def get(self) -> tuple[int, bytes] | Lagged | None:
+        """Wait for the next event. ``None`` means the feed was closed."""
+        item = await self._queue.get()
+        if item is _CLOSED:
+            return None
+        if isinstance(item, Lagged):
+            self._lagged = False
+        return item
+
+    def close(self) -> None:
+        self._closed = True
+        self._drain()
+        self._queue.put_nowait(_CLOSED)
+
+    def _drain(self) -> None:
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+
+class WorkoutEvents:
+    def __init__(self, max_buffer: int):
+        self.max_buffer = max_buffer
+        self._subscribers: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = Subscription(user_id, self.max_buffer)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.user_id]
+
+    def listening(self, user_id: str) -> bool:
+        return user_id in self._subscribers
+
+    def publish(self, user_id: str, workouts: list[tuple[int, dict[str, Any]]]) -> None:
+        """Hand committed workouts, as ``(id, data)`` pairs, to the athlete's subscribers."""
+        subscribers = self._subscribers.get(user_id)
+        if not subscribers:
+            return
+        for workout_id, data in workouts:
+            message = encode_event(workout_id, data)
+            for subscription in subscribers:
+                subscription.offer(workout_id, message)
+
+    def close(self) -> None:
+        """End every open stream, e.g. on shutdown."""
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.close()
+        self._subscribers.clear()
+
+
+workout_events = WorkoutEvents(settings.stream_buffer_size)
@@ -0,0 +1,43 @@
+"""Streaming encoders for the workout export endpoint.
+
+Rows come from a server-side cursor in fixed-size partitions and are encoded
+one chunk at a time, so memory use does not grow with the size of the table.
+"""
+
+import csv
+import io
+from collections.abc import AsyncIterator
+
+import orjson
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+CHUNK_ROWS = 1000
+
+
+async def _partitions(engine: AsyncEngine, statement: Select) -> AsyncIterator[list]:
+    # The connection is opened here rather than taken from the request's
+    # session, because the body is sent after the route function returns.
+    async with engine.connect() as connection:
+        result = await connection.stream(statement)
+        async for partition in result.partitions(CHUNK_ROWS):
+            yield partition
+
+
+async def stream_ndjson(engine: AsyncEngine, statement: Select) -> AsyncIterator[bytes]:
+    keys = tuple(statement.selected_columns.keys())
+    async for partition in _partitions(engine, statement):
+        yield b"".join(orjson.dumps(dict(zip(keys, row)), option=orjson.OPT_APPEND_NEWLINE) for row in partition)
+
+
+async def stream_csv(engine: AsyncEngine, statement: Select) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(statement.selected_columns.keys())
+    async for partition in _partitions(engine, statement):
+        writer.writerows(partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,187 @@
+"""Opt-in request and SQL instrumentation, rendered in Prometheus text format.
+
+Enabled with ``WORKOUT_METRICS=1``. ``MetricsMiddleware`` times each request
+by its route template. ``instrument_engine`` hooks SQLAlchemy's cursor events
+to time every statement and attribute it to the request that issued it.
+Statements slower than ``WORKOUT_SLOW_QUERY_MS`` are logged.
+"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...], labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        # Per label set: cumulative count per bucket, then the total count and sum.
+        self._series: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    labels = _format_labels(self.labels, values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labels, values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-2]}")
+                labels = _format_labels(self.labels, values)
+                lines.append(f"{self.name}_count{labels} {series[-2]}")
+                lines.append(f"{self.name}_sum{labels} {series[-1]}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "workout_request_duration_seconds",
+    "HTTP request latency by route.",
+    LATENCY_BUCKETS,
+    ("method", "route", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "workout_request_sql_queries",
+    "SQL statements issued per HTTP request.",
+    QUERY_COUNT_BUCKETS,
+    ("method", "route"),
+)
+REQUEST_SQL_TIME = Histogram(
+    "workout_request_sql_duration_seconds",
+    "Total SQL time per HTTP request.",
+    LATENCY_BUCKETS,
+    ("method", "route"),
+)
+QUERY_LATENCY = Histogram(
+    "workout_sql_query_duration_seconds",
+    "Latency of individual SQL statements.",
+    QUERY_LATENCY_BUCKETS,
+)
+SLOW_QUERIES = Counter(
+    "workout_sql_slow_queries_total",
+    "SQL statements slower than the slow-query threshold.",
+)
+
+REGISTRY = (REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_SQL_TIME, QUERY_LATENCY, SLOW_QUERIES)
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class _RequestQueries:
+    count: int = 0
+    seconds: float = 0.0
+
+
+_current_request: ContextVar[_RequestQueries | None] = ContextVar("workout_request_queries", default=None)
+
+
+def instrument_engine(engine: Engine, slow_query_ms: float) -> None:
+    """Time every statement run through ``engine`` (pass ``async_engine.sync_engine``)."""
+    slow_query_seconds = slow_query_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        QUERY_LATENCY.observe(elapsed)
+        stats = _current_request.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+        if elapsed >= slow_query_seconds:
+            SLOW_QUERIES.inc()
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:500])
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed responses are timed to their last byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestQueries()
+        token = _current_request.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+            # Label by route template, never the raw path, to keep cardinality bounded.
+            template = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method, template, str(status))
+            REQUEST_QUERIES.observe(stats.count, method, template)
+            REQUEST_SQL_TIME.observe(stats.seconds, method, template)
@@ -0,0 +1,311 @@
+"""Schema migrations for existing workouts.db files.
+
+Each step upgrades the database by one version. The applied version is kept
+in SQLite's ``PRAGMA user_version``, so a step runs at most once per file.
+Steps run after ``create_all`` and must also be safe on a freshly created
+database. Steps use frozen SQL rather than the current models, because the
+models keep changing after a step is written.
+
+The summary, record and search tables hold nothing that cannot be derived
+from ``workout``. ``create_all`` makes them from the current models before
+the steps run, so the steps that introduced them recreate them in the
+layout they shipped with, and migration 5 rebuilds them all per user.
+"""
+
+import datetime
+import logging
+from collections.abc import Callable
+
+from sqlalchemy import Connection
+
+from models.records import PersonalRecord, RepRecord
+from models.stats import ExerciseTotals, WeeklyVolume
+from services.config import settings
+from services.records import rebuild_records
+from services.search import create_search_index, drop_search_index
+from services.stats import rebuild_summaries
+
+logger = logging.getLogger(__name__)
+
+_DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d", "%d %b %Y", "%b %d %Y", "%B %d %Y")
+
+
+def _parse_legacy_date(value: str) -> datetime.date | None:
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value[:10])
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _column_types(connection: Connection, table: str) -> dict[str, str]:
+    rows = connection.exec_driver_sql(f"PRAGMA table_info({table})").all()
+    return {row[1]: row[2].upper() for row in rows}
+
+
+def _convert_workout_dates(connection: Connection) -> None:
+    """Retype ``workout.date`` from free text to DATE.
+
+    SQLite cannot alter a column's type, so the table is rebuilt. Strings are
+    normalised to ISO dates on the way across. Values that cannot be parsed
+    become NULL and are logged. Indexes are recreated afterwards by ``init_db``.
+    """
+    if _column_types(connection, "workout").get("date") == "DATE":
+        return
+
+    connection.exec_driver_sql(
+        """
+        CREATE TABLE workout_new (
+            id INTEGER NOT NULL,
+            exercise VARCHAR NOT NULL,
+            sets INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            weight FLOAT NOT NULL,
+            date DATE,
+            PRIMARY KEY (id)
+        )
+        """
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO workout_new (id, exercise, sets, reps, weight, date) "
+        "SELECT id, exercise, sets, reps, weight, NULL FROM workout"
+    )
+
+    updates = []
+    unparsed = 0
+    for workout_id, raw in connection.exec_driver_sql(
+        "SELECT id, date FROM workout WHERE date IS NOT NULL"
+    ):
+        parsed = _parse_legacy_date(str(raw))
+        if parsed is None:
+            unparsed += 1
+            continue
+        updates.append((parsed.isoformat(), workout_id))
+    if updates:
+        connection.exec_driver_sql("UPDATE workout_new SET date = ? WHERE id = ?", updates)
+    if unparsed:
+        logger.warning("Cleared %d workout dates that could not be parsed", unparsed)
+
+    connection.exec_driver_sql("DROP TABLE workout")
+    connection.exec_driver_sql("ALTER TABLE workout_new RENAME TO workout")
+
+
+_E1RM_SQL = "MAX(CASE WHEN reps <= 1 THEN weight ELSE weight * (1 + reps / 30.0) END)"
+
+
+def _backfill_summaries(connection: Connection) -> None:
+    """Fill the new summary tables from the workouts already stored."""
+    connection.exec_driver_sql("DROP TABLE IF EXISTS exercise_totals")
+    connection.exec_driver_sql("DROP TABLE IF EXISTS weekly_volume")
+    connection.exec_driver_sql(
+        """
+        CREATE TABLE exercise_totals (
+            exercise VARCHAR NOT NULL,
+            workouts INTEGER NOT NULL,
+            total_sets INTEGER NOT NULL,
+            total_reps INTEGER NOT NULL,
+            total_volume FLOAT NOT NULL,
+            best_e1rm FLOAT NOT NULL,
+            first_date DATE,
+            last_date DATE,
+            PRIMARY KEY (exercise)
+        )
+        """
+    )
+    connection.exec_driver_sql(
+        """
+        CREATE TABLE weekly_volume (
+            exercise VARCHAR NOT NULL,
+            week_start DATE NOT NULL,
+            total_sets INTEGER NOT NULL,
+            total_reps INTEGER NOT NULL,
+            total_volume FLOAT NOT NULL,
+            best_e1rm FLOAT NOT NULL,
+            PRIMARY KEY (exercise, week_start)
+        )
+        """
+    )
+    connection.exec_driver_sql("CREATE INDEX ix_weekly_volume_week_start ON weekly_volume (week_start)")
+    connection.exec_driver_sql(
+        "INSERT INTO exercise_totals "
+        "(exercise, workouts, total_sets, total_reps, total_volume, best_e1rm, first_date, last_date) "
+        "SELECT exercise, COUNT(*), SUM(sets), SUM(sets * reps), SUM(sets * reps * weight), "
+        f"{_E1RM_SQL}, MIN(date), MAX(date) "
+        "FROM workout GROUP BY exercise"
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO weekly_volume "
+        "(exercise, week_start, total_sets, total_reps, total_volume, best_e1rm) "
+        "SELECT exercise, date(date, 'weekday 0', '-6 days') AS week, SUM(sets), SUM(sets * reps), "
+        f"SUM(sets * reps * weight), {_E1RM_SQL} "
+        "FROM workout WHERE date IS NOT NULL GROUP BY exercise, week"
+    )
+
+
+def _add_exercise_search(connection: Connection) -> None:
+    """Create the FTS5 exercise index (not part of the SQLModel metadata)."""
+    connection.exec_driver_sql(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS exercise_fts USING fts5(
+            exercise,
+            content='exercise_totals',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='1 2 3'
+        )
+        """
+    )
+    connection.exec_driver_sql(
+        """
+        CREATE TRIGGER IF NOT EXISTS exercise_totals_fts_insert AFTER INSERT ON exercise_totals BEGIN
+            INSERT INTO exercise_fts(rowid, exercise) VALUES (new.rowid, new.exercise);
+        END
+        """
+    )
+    connection.exec_driver_sql(
+        """
+        CREATE TRIGGER IF NOT EXISTS exercise_totals_fts_delete AFTER DELETE ON exercise_totals BEGIN
+            INSERT INTO exercise_fts(exercise_fts, rowid, exercise) VALUES ('delete', old.rowid, old.exercise);
+        END
+        """
+    )
+    connection.exec_driver_sql("INSERT INTO exercise_fts(exercise_fts) VALUES ('rebuild')")
+
+
+def _backfill_records(connection: Connection) -> None:
+    """Fill the personal-record tables from the workouts already stored."""
+    connection.exec_driver_sql("DROP TABLE IF EXISTS personal_records")
+    connection.exec_driver_sql("DROP TABLE IF EXISTS rep_records")
+    connection.exec_driver_sql(
+        """
+        CREATE TABLE personal_records (
+            exercise VARCHAR NOT NULL,
+            best_weight FLOAT NOT NULL,
+            best_weight_reps INTEGER NOT NULL,
+            best_weight_workout_id INTEGER NOT NULL,
+            best_weight_date DATE,
+            best_set_volume FLOAT NOT NULL,
+            best_set_volume_workout_id INTEGER NOT NULL,
+            best_set_volume_date DATE,
+            PRIMARY KEY (exercise)
+        )
+        """
+    )
+    connection.exec_driver_sql(
+        """
+        CREATE TABLE rep_records (
+            exercise VARCHAR NOT NULL,
+            weight FLOAT NOT NULL,
+            reps INTEGER NOT NULL,
+            workout_id INTEGER NOT NULL,
+            date DATE,
+            PRIMARY KEY (exercise, weight)
+        )
+        """
+    )
+    connection.exec_driver_sql(
+        """
+        INSERT INTO personal_records (
+            exercise, best_weight, best_weight_reps, best_weight_workout_id, best_weight_date,
+            best_set_volume, best_set_volume_workout_id, best_set_volume_date
+        )
+        SELECT bw.exercise, bw.weight, bw.reps, bw.id, bw.date, bv.volume, bv.id, bv.date
+        FROM (
+            SELECT exercise, weight, reps, id, date,
+                   ROW_NUMBER() OVER (PARTITION BY exercise ORDER BY weight DESC, reps DESC, id) AS rn
+            FROM workout
+        ) AS bw
+        JOIN (
+            SELECT exercise, reps * weight AS volume, id, date,
+                   ROW_NUMBER() OVER (PARTITION BY exercise ORDER BY reps * weight DESC, id) AS rn
+            FROM workout
+        ) AS bv ON bv.exercise = bw.exercise AND bv.rn = 1
+        WHERE bw.rn = 1
+        """
+    )
+    connection.exec_driver_sql(
+        """
+        INSERT INTO rep_records (exercise, weight, reps, workout_id, date)
+        SELECT exercise, weight, reps, id, date
+        FROM (
+            SELECT exercise, weight, reps, id, date,
+                   ROW_NUMBER() OVER (PARTITION BY exercise, weight ORDER BY reps DESC, id) AS rn
+            FROM workout
+        )
+        WHERE rn = 1
+        """
+    )
+
+
+def _add_workout_user(connection: Connection) -> None:
+    """Add ``workout.user_id`` and give existing rows to the default user.
+
+    The table is rebuilt so the column can be NOT NULL without a lasting
+    default. This also drops the old indexes that did not lead with the
+    user; ``init_db`` creates the user-leading ones afterwards. The derived
+    tables are then rebuilt with their user-leading keys.
+    """
+    if "user_id" not in _column_types(connection, "workout"):
+        connection.exec_driver_sql(
+            """
+            CREATE TABLE workout_new (
+                id INTEGER NOT NULL,
+                user_id VARCHAR NOT NULL,
+                exercise VARCHAR NOT NULL,
+                sets INTEGER NOT NULL,
+                reps INTEGER NOT NULL,
+                weight FLOAT NOT NULL,
+                date DATE,
+                PRIMARY KEY (id)
+            )
+            """
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO workout_new (id, user_id, exercise, sets, reps, weight, date) "
+            "SELECT id, ?, exercise, sets, reps, weight, date FROM workout",
+            (settings.default_user or "default",),
+        )
+        connection.exec_driver_sql("DROP TABLE workout")
+        connection.exec_driver_sql("ALTER TABLE workout_new RENAME TO workout")
+    rebuild_derived(connection)
+
+
+DERIVED_TABLES = (ExerciseTotals, WeeklyVolume, PersonalRecord, RepRecord)
+
+
+def rebuild_derived(connection: Connection) -> None:
+    """Recreate the summary, record and search tables and refill them."""
+    drop_search_index(connection)
+    for model in DERIVED_TABLES:
+        model.__table__.drop(connection, checkfirst=True)
+        model.__table__.create(connection)
+    rebuild_summaries(connection)
+    rebuild_records(connection)
+    # Built last so the bulk summary insert does not fire the FTS triggers.
+    create_search_index(connection)
+
+
+MIGRATIONS: list[tuple[int, Callable[[Connection], None]]] = [
+    (1, _convert_workout_dates),
+    (2, _backfill_summaries),
+    (3, _add_exercise_search),
+    (4, _backfill_records),
+    (5, _add_workout_user),
+]
+
+
+def run_migrations(connection: Connection) -> None:
+    current = connection.exec_driver_sql("PRAGMA user_version").scalar() or 0
+    for version, step in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info("Applying workouts.db migration %d (%s)", version, step.__name__)
+        step(connection)
+        connection.exec_driver_sql(f"PRAGMA user_version = {version}")
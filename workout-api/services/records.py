@@ -0,0 +1,161 @@
+"""Personal records kept in step with the workout table.
+
+``personal_records`` holds one row per athlete and exercise with the heaviest set
+(ties go to more reps) and the biggest single-set volume (reps x weight).
+``rep_records`` holds the most reps ever done at each (exercise, weight)
+per athlete.
+Both are updated in the insert transaction, so reading an exercise's
+records is a primary-key lookup. The earliest workout keeps a record when
+a later one only ties it.
+"""
+
+from sqlalchemy import Connection, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from models.records import PersonalRecord, RepRecord
+from models.workout import WorkoutCreate
+
+# Flag names reported back to the client when a workout sets a record.
+BEST_WEIGHT = "best_weight"
+BEST_SET_VOLUME = "best_set_volume"
+REPS_AT_WEIGHT = "reps_at_weight"
+
+
+def _upsert(model, keys: list[str], rows: list[dict]):
+    statement = insert(model)
+    return statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={column: statement.excluded[column] for column in rows[0] if column not in keys},
+    )
+
+
+async def update_records(
+    connection: AsyncConnection, user_id: str, ids: list[int], payloads: list[WorkoutCreate]
+) -> list[list[str]]:
+    """Fold one athlete's newly inserted workouts into the record tables.
+
+    Returns, for each workout, the names of the records it set.
+    """
+    if not payloads:
+        return []
+
+    exercises = {p.exercise for p in payloads}
+    pairs = {(p.exercise, p.weight) for p in payloads}
+    personal = {
+        row.exercise: dict(row._mapping)
+        for row in await connection.execute(
+            select(PersonalRecord.__table__).where(
+                PersonalRecord.user_id == user_id, PersonalRecord.exercise.in_(exercises)
+            )
+        )
+    }
+    reps = {
+        (row.exercise, row.weight): dict(row._mapping)
+        for row in await connection.execute(
+            select(RepRecord.__table__).where(
+                RepRecord.user_id == user_id, tuple_(RepRecord.exercise, RepRecord.weight).in_(pairs)
+            )
+        )
+    }
+
+    changed_personal: set[str] = set()
+    changed_reps: set[tuple[str, float]] = set()
+    flags: list[list[str]] = []
+    for workout_id, payload in zip(ids, payloads):
+        new_records = []
+        volume = payload.reps * payload.weight
+        record = personal.get(payload.exercise)
+        if record is None:
+            record = personal[payload.exercise] = {
+                "user_id": user_id,
+                "exercise": payload.exercise,
+                "best_weight": payload.weight,
+                "best_weight_reps": payload.reps,
+                "best_weight_workout_id": workout_id,
+                "best_weight_date": payload.date,
+                "best_set_volume": volume,
+                "best_set_volume_workout_id": workout_id,
+                "best_set_volume_date": payload.date,
+            }
+            new_records += [BEST_WEIGHT, BEST_SET_VOLUME]
+            changed_personal.add(payload.exercise)
+        else:
+            if (payload.weight, payload.reps) > (record["best_weight"], record["best_weight_reps"]):
+                record.update(
+                    best_weight=payload.weight,
+                    best_weight_reps=payload.reps,
+                    best_weight_workout_id=workout_id,
+                    best_weight_date=payload.date,
+                )
+                new_records.append(BEST_WEIGHT)
+                changed_personal.add(payload.exercise)
+            if volume > record["best_set_volume"]:
+                record.update(
+                    best_set_volume=volume,
+                    best_set_volume_workout_id=workout_id,
+                    best_set_volume_date=payload.date,
+                )
+                new_records.append(BEST_SET_VOLUME)
+                changed_personal.add(payload.exercise)
+
+        key = (payload.exercise, payload.weight)
+        rep_record = reps.get(key)
+        if rep_record is None or payload.reps > rep_record["reps"]:
+            reps[key] = {
+                "user_id": user_id,
+                "exercise": payload.exercise,
+                "weight": payload.weight,
+                "reps": payload.reps,
+                "workout_id": workout_id,
+                "date": payload.date,
+            }
+            new_records.append(REPS_AT_WEIGHT)
+            changed_reps.add(key)
+        flags.append(new_records)
+
+    if changed_personal:
+        rows = [personal[exercise] for exercise in changed_personal]
+        await connection.execute(_upsert(PersonalRecord, ["user_id", "exercise"], rows), rows)
+    if changed_reps:
+        rows = [reps[key] for key in changed_reps]
+        await connection.execute(_upsert(RepRecord, ["user_id", "exercise", "weight"], rows), rows)
+    return flags
+
+
+def rebuild_records(connection: Connection) -> None:
+    """Recompute both record tables from the workout table."""
+    connection.exec_driver_sql("DELETE FROM personal_records")
+    connection.exec_driver_sql(
+        """
+        INSERT INTO personal_records (
+            user_id, exercise, best_weight, best_weight_reps, best_weight_workout_id, best_weight_date,
+            best_set_volume, best_set_volume_workout_id, best_set_volume_date
+        )
+        SELECT bw.user_id, bw.exercise, bw.weight, bw.reps, bw.id, bw.date, bv.volume, bv.id, bv.date
+        FROM (
+            SELECT user_id, exercise, weight, reps, id, date,
+                   ROW_NUMBER() OVER (PARTITION BY user_id, exercise ORDER BY weight DESC, reps DESC, id) AS rn
+            FROM workout
+        ) AS bw
+        JOIN (
+            SELECT user_id, exercise, reps * weight AS volume, id, date,
+                   ROW_NUMBER() OVER (PARTITION BY user_id, exercise ORDER BY reps * weight DESC, id) AS rn
+            FROM workout
+        ) AS bv ON bv.user_id = bw.user_id AND bv.exercise = bw.exercise AND bv.rn = 1
+        WHERE bw.rn = 1
+        """
+    )
+    connection.exec_driver_sql("DELETE FROM rep_records")
+    connection.exec_driver_sql(
+        """
+        INSERT INTO rep_records (user_id, exercise, weight, reps, workout_id, date)
+        SELECT user_id, exercise, weight, reps, id, date
+        FROM (
+            SELECT user_id, exercise, weight, reps, id, date,
+                   ROW_NUMBER() OVER (PARTITION BY user_id, exercise, weight ORDER BY reps DESC, id) AS rn
+            FROM workout
+        )
+        WHERE rn = 1
+        """
+    )
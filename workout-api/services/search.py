@@ -0,0 +1,85 @@
+"""FTS5 index over exercise names for search-as-you-type.
+
+``exercise_fts`` is an external-content FTS5 table over ``exercise_totals``.
+That table already has one row per athlete and exercise name with its
+workout count. The user id is indexed as a second column so a search is
+restricted to one athlete inside the FTS query itself. Triggers keep the
+index in step with inserts and deletes, so the single and bulk write paths
+need no extra work. Matches are ranked by how often the exercise was logged.
+"""
+
+import re
+
+from sqlalchemy import Connection, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+_FTS_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS exercise_fts USING fts5(
+        user_id,
+        exercise,
+        content='exercise_totals',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS exercise_totals_fts_insert AFTER INSERT ON exercise_totals BEGIN
+        INSERT INTO exercise_fts(rowid, user_id, exercise) VALUES (new.rowid, new.user_id, new.exercise);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS exercise_totals_fts_delete AFTER DELETE ON exercise_totals BEGIN
+        INSERT INTO exercise_fts(exercise_fts, rowid, user_id, exercise)
+        VALUES ('delete', old.rowid, old.user_id, old.exercise);
+    END
+    """,
+)
+
+_SEARCH_SQL = text(
+    """
+    SELECT t.exercise, t.workouts
+    FROM exercise_fts
+    JOIN exercise_totals AS t ON t.rowid = exercise_fts.rowid
+    WHERE exercise_fts MATCH :query AND t.user_id = :user_id
+    ORDER BY t.workouts DESC, t.exercise
+    LIMIT :limit
+    """
+)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def create_search_index(connection: Connection) -> None:
+    """Create the FTS table and triggers, then index every existing exercise."""
+    for statement in _FTS_SCHEMA:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql("INSERT INTO exercise_fts(exercise_fts) VALUES ('rebuild')")
+
+
+def drop_search_index(connection: Connection) -> None:
+    connection.exec_driver_sql("DROP TRIGGER IF EXISTS exercise_totals_fts_insert")
+    connection.exec_driver_sql("DROP TRIGGER IF EXISTS exercise_totals_fts_delete")
+    connection.exec_driver_sql("DROP TABLE IF EXISTS exercise_fts")
+
+
+def prefix_query(q: str) -> str | None:
+    """Turn user input into an FTS5 query where every word is a prefix match."""
+    tokens = _TOKEN.findall(q)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+async def search_exercises(
+    connection: AsyncConnection, user_id: str, q: str, limit: int
+) -> list[tuple[str, int]]:
+    query = prefix_query(q)
+    if query is None:
+        return []
+    # The tokenizer splits ids on punctuation, so the column filter narrows
+    # the match and the join on t.user_id makes it exact.
+    user_phrase = '"' + user_id.replace('"', '""') + '"'
+    query = f"user_id:{user_phrase} AND exercise:({query})"
+    result = await connection.execute(_SEARCH_SQL, {"query": query, "user_id": user_id, "limit": limit})
+    return [tuple(row) for row in result]
@@ -0,0 +1,159 @@
+"""Summary tables kept in step with the workout table.
+
+Totals per athlete and exercise, and per athlete, exercise and week, are
+updated in the same transaction as every insert. The stats endpoints read
+them directly instead of aggregating raw workouts. Weeks start on Monday.
+Volume is sets x reps x weight. Estimated 1RM uses the Epley formula.
+"""
+
+import datetime
+from dataclasses import dataclass
+
+from sqlalchemy import Connection, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from models.stats import ExerciseTotals, WeeklyVolume
+from models.workout import WorkoutCreate
+
+
+def estimate_1rm(weight: float, reps: int) -> float:
+    if reps <= 1:
+        return weight
+    return weight * (1 + reps / 30)
+
+
+def week_start(day: datetime.date) -> datetime.date:
+    return day - datetime.timedelta(days=day.weekday())
+
+
+@dataclass
+class _Totals:
+    workouts: int = 0
+    total_sets: int = 0
+    total_reps: int = 0
+    total_volume: float = 0
+    best_e1rm: float = 0
+    first_date: datetime.date | None = None
+    last_date: datetime.date | None = None
+
+    def add(self, payload: WorkoutCreate) -> None:
+        self.workouts += 1
+        self.total_sets += payload.sets
+        self.total_reps += payload.sets * payload.reps
+        self.total_volume += payload.sets * payload.reps * payload.weight
+        self.best_e1rm = max(self.best_e1rm, estimate_1rm(payload.weight, payload.reps))
+        if payload.date is not None:
+            if self.first_date is None or payload.date < self.first_date:
+                self.first_date = payload.date
+            if self.last_date is None or payload.date > self.last_date:
+                self.last_date = payload.date
+
+
+async def update_summaries(connection: AsyncConnection, user_id: str, payloads: list[WorkoutCreate]) -> None:
+    """Fold one athlete's newly inserted workouts into the summary tables.
+
+    Rows are grouped in memory first, so a batch costs one upsert per touched
+    exercise and week instead of one per workout.
+    """
+    if not payloads:
+        return
+
+    per_exercise: dict[str, _Totals] = {}
+    per_week: dict[tuple[str, datetime.date], _Totals] = {}
+    for payload in payloads:
+        per_exercise.setdefault(payload.exercise, _Totals()).add(payload)
+        if payload.date is not None:
+            key = (payload.exercise, week_start(payload.date))
+            per_week.setdefault(key, _Totals()).add(payload)
+
+    statement = insert(ExerciseTotals)
+    excluded = statement.excluded
+    table = ExerciseTotals.__table__.c
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.user_id, table.exercise],
+        set_={
+            "workouts": table.workouts + excluded.workouts,
+            "total_sets": table.total_sets + excluded.total_sets,
+            "total_reps": table.total_reps + excluded.total_reps,
+            "total_volume": table.total_volume + excluded.total_volume,
+            "best_e1rm": func.max(table.best_e1rm, excluded.best_e1rm),
+            # SQLite's scalar min/max return NULL if either side is NULL.
+            "first_date": func.coalesce(
+                func.min(table.first_date, excluded.first_date), table.first_date, excluded.first_date
+            ),
+            "last_date": func.coalesce(
+                func.max(table.last_date, excluded.last_date), table.last_date, excluded.last_date
+            ),
+        },
+    )
+    await connection.execute(
+        statement,
+        [
+            {
+                "user_id": user_id,
+                "exercise": exercise,
+                "workouts": totals.workouts,
+                "total_sets": totals.total_sets,
+                "total_reps": totals.total_reps,
+                "total_volume": totals.total_volume,
+                "best_e1rm": totals.best_e1rm,
+                "first_date": totals.first_date,
+                "last_date": totals.last_date,
+            }
+            for exercise, totals in per_exercise.items()
+        ],
+    )
+
+    if not per_week:
+        return
+    statement = insert(WeeklyVolume)
+    excluded = statement.excluded
+    table = WeeklyVolume.__table__.c
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.user_id, table.exercise, table.week_start],
+        set_={
+            "total_sets": table.total_sets + excluded.total_sets,
+            "total_reps": table.total_reps + excluded.total_reps,
+            "total_volume": table.total_volume + excluded.total_volume,
+            "best_e1rm": func.max(table.best_e1rm, excluded.best_e1rm),
+        },
+    )
+    await connection.execute(
+        statement,
+        [
+            {
+                "user_id": user_id,
+                "exercise": exercise,
+                "week_start": week,
+                "total_sets": totals.total_sets,
+                "total_reps": totals.total_reps,
+                "total_volume": totals.total_volume,
+                "best_e1rm": totals.best_e1rm,
+            }
+            for (exercise, week), totals in per_week.items()
+        ],
+    )
+
+
+_E1RM_SQL = "MAX(CASE WHEN reps <= 1 THEN weight ELSE weight * (1 + reps / 30.0) END)"
+
+
+def rebuild_summaries(connection: Connection) -> None:
+    """Recompute every summary row from the workout table."""
+    connection.exec_driver_sql("DELETE FROM exercise_totals")
+    connection.exec_driver_sql(
+        "INSERT INTO exercise_totals "
+        "(user_id, exercise, workouts, total_sets, total_reps, total_volume, best_e1rm, first_date, last_date) "
+        "SELECT user_id, exercise, COUNT(*), SUM(sets), SUM(sets * reps), SUM(sets * reps * weight), "
+        f"{_E1RM_SQL}, MIN(date), MAX(date) "
+        "FROM workout GROUP BY user_id, exercise"
+    )
+    connection.exec_driver_sql("DELETE FROM weekly_volume")
+    connection.exec_driver_sql(
+        "INSERT INTO weekly_volume "
+        "(user_id, exercise, week_start, total_sets, total_reps, total_volume, best_e1rm) "
+        "SELECT user_id, exercise, date(date, 'weekday 0', '-6 days') AS week, SUM(sets), SUM(sets * reps), "
+        f"SUM(sets * reps * weight), {_E1RM_SQL} "
+        "FROM workout WHERE date IS NOT NULL GROUP BY user_id, exercise, week"
+    )
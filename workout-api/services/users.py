@@ -0,0 +1,21 @@
+import re
+
+from fastapi import Header, HTTPException
+
+from services.config import settings
+
+USER_ID_PATTERN = re.compile(r"[A-Za-z0-9_.@-]{1,64}")
+
+
+def current_user(x_user_id: str | None = Header(default=None)) -> str:
+    """The athlete a request acts for, taken from the ``X-User-Id`` header.
+
+    Requests without the header use ``WORKOUT_DEFAULT_USER``. Set that to an
+    empty string to make the header mandatory.
+    """
+    user_id = x_user_id or settings.default_user
+    if not user_id:
+        raise HTTPException(status_code=401, detail="X-User-Id header is required")
+    if not USER_ID_PATTERN.fullmatch(user_id):
+        raise HTTPException(status_code=400, detail="X-User-Id must be 1-64 letters, digits or _.@-")
+    return user_id
@@ -0,0 +1,57 @@
+from dataclasses import dataclass, field
+
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.workout import Workout, WorkoutCreate
+from services.cache import table_version
+from services.events import workout_events
+from services.records import update_records
+from services.stats import update_summaries
+
+
+@dataclass
+class SavedWorkout:
+    id: int
+    new_records: list[str] = field(default_factory=list)
+
+
+async def insert_workouts(session: AsyncSession, user_id: str, payloads: list[WorkoutCreate]) -> list[SavedWorkout]:
+    """Insert many workouts for one athlete with a single executemany.
+
+    The summary and personal-record tables are updated on the same
+    connection. The caller owns the transaction, so a whole batch and
+    everything derived from it land in one commit.
+    """
+    if not payloads:
+        return []
+    statement = insert(Workout).returning(Workout.id, sort_by_parameter_order=True)
+    connection = await session.connection()
+    result = await connection.execute(statement, [{**p.model_dump(), "user_id": user_id} for p in payloads])
+    ids = list(result.scalars())
+    await update_summaries(connection, user_id, payloads)
+    flags = await update_records(connection, user_id, ids, payloads)
+    return [SavedWorkout(id=workout_id, new_records=records) for workout_id, records in zip(ids, flags)]
+
+
+def notify_committed(user_id: str, payloads: list[WorkoutCreate], saved: list[SavedWorkout]) -> None:
+    """Tell readers and live subscribers about workouts that were just committed."""
+    if not saved:
+        return
+    table_version.bump(user_id)
+    if workout_events.listening(user_id):
+        workout_events.publish(
+            user_id,
+            [
+                (workout.id, {"id": workout.id, **payload.model_dump(), "new_records": workout.new_records})
+                for payload, workout in zip(payloads, saved)
+            ],
+        )
+
+
+async def save_workouts(session: AsyncSession, user_id: str, payloads: list[WorkoutCreate]) -> list[SavedWorkout]:
+    """Insert and commit workouts, then tell readers the data changed."""
+    saved = await insert_workouts(session, user_id, payloads)
+    await session.commit()
+    notify_committed(user_id, payloads, saved)
+    return saved
@@ -0,0 +1,139 @@
+"""Write-behind queue that folds many POST /workouts into group commits.
+
+Enabled with ``WORKOUT_WRITE_MODE``:
+
+- ``direct`` (default): every request commits its own row.
+- ``group``: requests are queued and answered once the group commit holding
+  them has landed. The response is as durable as in ``direct`` mode, and
+  bursts share one commit instead of paying one fsync each.
+- ``deferred``: requests are answered with 202 as soon as they are queued.
+  This is the fastest mode, but rows still queued are lost if the process
+  dies.
+
+A flush starts when ``WORKOUT_WRITE_BATCH_SIZE`` rows are waiting or when
+``WORKOUT_WRITE_FLUSH_MS`` has passed since the oldest queued row, whichever
+comes first. A flush commits once per database shard, with every athlete's
+rows in that shard inserted in the same transaction. A full queue pushes
+back on callers with ``QueueFull``. On shutdown, everything already queued
+is flushed before the engines close.
+"""
+
+import asyncio
+import logging
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.workout import WorkoutCreate
+from services.config import settings
+from services.db import engines, shard_for
+from services.workouts import SavedWorkout, insert_workouts, notify_committed
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class QueueFull(Exception):
+    """The queue stayed full for longer than the enqueue timeout."""
+
+
+class QueueClosed(Exception):
+    """The queue is draining for shutdown and takes no new writes."""
+
+
+class WriteBehindQueue:
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float, enqueue_timeout: float):
+        self._queue: asyncio.Queue = asyncio.Queue(max_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._enqueue_timeout = enqueue_timeout
+        self._batch_ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    def start(self) -> None:
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name="workout-write-behind")
+
+    async def stop(self) -> None:
+        """Stop taking writes and flush what is already queued."""
+        if self._task is None:
+            return
+        self._closing = True
+        await self._queue.put(_STOP)
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+
+    async def submit(self, user_id: str, payload: WorkoutCreate, wait: bool) -> SavedWorkout | None:
+        """Queue a workout for an athlete. With ``wait``, return it once committed."""
+        if self._closing or self._task is None:
+            raise QueueClosed()
+        future = asyncio.get_running_loop().create_future() if wait else None
+        try:
+            await asyncio.wait_for(self._queue.put((user_id, payload, future)), self._enqueue_timeout)
+        except TimeoutError:
+            raise QueueFull() from None
+        if self._queue.qsize() >= self._batch_size:
+            self._batch_ready.set()
+        return await future if future is not None else None
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            if self._queue.qsize() < self._batch_size - 1:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self._flush_interval)
+                except TimeoutError:
+                    pass
+
+            batch = [item]
+            while len(batch) < self._batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            shards: dict[int, list] = {}
+            for item in batch:
+                shards.setdefault(shard_for(item[0]), []).append(item)
+            for shard, items in shards.items():
+                await self._flush(shard, items)
+
+    async def _flush(self, shard: int, batch: list[tuple[str, WorkoutCreate, asyncio.Future | None]]) -> None:
+        per_user: dict[str, list] = {}
+        for item in batch:
+            per_user.setdefault(item[0], []).append(item)
+        try:
+            async with AsyncSession(engines[shard]) as session:
+                saved = {
+                    user_id: await insert_workouts(session, user_id, [payload for _, payload, _ in items])
+                    for user_id, items in per_user.items()
+                }
+                await session.commit()
+        except Exception as exc:
+            logger.exception("Group commit of %d workouts to shard %d failed", len(batch), shard)
+            for _, _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+            return
+        for user_id, items in per_user.items():
+            notify_committed(user_id, [payload for _, payload, _ in items], saved[user_id])
+            for (_, _, future), workout in zip(items, saved[user_id]):
+                if future is not None and not future.done():
+                    future.set_result(workout)
+
+
+write_queue = WriteBehindQueue(
+    max_size=settings.write_queue_size,
+    batch_size=settings.write_batch_size,
+    flush_interval=settings.write_flush_ms / 1000,
+    enqueue_timeout=settings.write_enqueue_timeout,
+)